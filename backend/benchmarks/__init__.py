@@ -0,0 +1,8 @@
+"""
+Standalone benchmarks. Run from the backend directory, e.g.
+
+    python -m benchmarks.bench_keywords
+
+catalog_gen builds synthetic catalogs of any size; load drives every API
+endpoint against them and saves JSON results under benchmarks/results/.
+"""
@@ -0,0 +1,128 @@
+"""
+Compare the compiled KeywordIndex with the original substring loop used by
+/api/diagnose Stage 1 as the keyword table grows.
+
+--check instead runs both matchers over SAMPLE_PROBLEMS, prints where they
+disagree, and fails if the index misses a keyword a sample expects.
+
+    python -m benchmarks.bench_keywords [--sizes 61 1000 5000] [--problems 2000]
+    python -m benchmarks.bench_keywords --check
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from diagnostics import KeywordIndex
+
+WORDS = [
+    "after", "again", "audio", "battery", "bluetooth", "boot", "broken", "card",
+    "cannot", "connect", "crackling", "display", "driver", "external", "fails",
+    "flicker", "games", "headphones", "laptop", "login", "monitor", "mouse",
+    "network", "nothing", "printer", "random", "screen", "slow", "sound",
+    "speaker", "stopped", "suspend", "the", "update", "when", "wifi", "works",
+]
+
+# (problem, keywords the index must find in it)
+SAMPLE_PROBLEMS: List[Tuple[str, List[str]]] = [
+    ("firefox keeps crashing on startup", ["crash"]),
+    ("kwin crashes whenever I plug in a monitor", ["crash", "monitor"]),
+    ("the whole system crashed overnight", ["crash"]),
+    ("screen freezing after resume", ["screen", "freeze"]),
+    ("desktop freezes randomly", ["freeze"]),
+    ("display flickering with the nvidia driver", ["display", "flicker"]),
+    ("external monitors flickered at 144hz", ["monitor", "flicker"]),
+    ("games lagging on wayland", ["wayland", "lag"]),
+    ("mouse lags behind the cursor", ["mouse", "cursor", "lag"]),
+    ("laptop not booting after kernel update", ["boot", "kernel", "update"]),
+    ("won't wake from sleeping", ["sleep"]),
+    ("cannot connect bluetooth speakers", ["bluetooth", "speaker"]),
+    ("printing fails on my usb printer", ["printing", "printer", "usb"]),
+    ("kernel updated and audio glitches now", ["kernel", "update", "audio", "glitch"]),
+    ("no doubt the fonts are broken", ["fonts"]),
+]
+
+def substring_loop(keywords: Dict[str, List[str]], problem: str):
+    """The pre-index Stage 1 matcher, kept verbatim for comparison."""
+    keyword_matches = set()
+    matched_keywords = []
+    for keyword, packages in keywords.items():
+        if keyword in problem:
+            keyword_matches.update(packages)
+            matched_keywords.append(keyword)
+    return matched_keywords, keyword_matches
+
+def check_samples(keywords: Dict[str, List[str]]) -> bool:
+    """Run both matchers over SAMPLE_PROBLEMS; False if the index misses an expected keyword."""
+    index = KeywordIndex(keywords)
+    ok = True
+    for problem, expected in SAMPLE_PROBLEMS:
+        old = set(substring_loop(keywords, problem.lower())[0])
+        new = set(index.match(problem).keywords)
+        missing = [keyword for keyword in expected if keyword not in new]
+        ok = ok and not missing
+        print(f"{'FAIL' if missing else 'ok':<5} {problem}")
+        if old - new:
+            print(f"      only substring: {sorted(old - new)}")
+        if new - old:
+            print(f"      only index:     {sorted(new - old)}")
+        if missing:
+            print(f"      missing:        {missing}")
+    return ok
+
+def synthetic_keywords(base: Dict[str, List[str]], size: int, rng: random.Random) -> Dict[str, List[str]]:
+    keywords = dict(list(base.items())[:size])
+    packages = sorted({pkg for pkgs in base.values() for pkg in pkgs})
+    while len(keywords) < size:
+        length = rng.choice((1, 1, 1, 2, 3))
+        phrase = " ".join(
+            "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+            for _ in range(length)
+        )
+        keywords.setdefault(phrase, rng.sample(packages, 3))
+    return keywords
+
+def synthetic_problems(count: int, rng: random.Random) -> List[str]:
+    return [" ".join(rng.choices(WORDS, k=rng.randint(6, 30))) for _ in range(count)]
+
+def time_per_call(fn, problems: List[str], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for problem in problems:
+            fn(problem)
+        best = min(best, time.perf_counter() - started)
+    return best / len(problems) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[61, 500, 1000, 2500, 5000])
+    parser.add_argument("--problems", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--check", action="store_true", help="compare the matchers on SAMPLE_PROBLEMS instead")
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    with open('diagnostic_rules.json', 'r') as f:
+        base = json.load(f)['keywords']
+    if args.check:
+        sys.exit(0 if check_samples(base) else 1)
+    problems = synthetic_problems(args.problems, rng)
+    
+    print(f"{'keywords':>9} {'loop µs':>10} {'index µs':>10} {'build ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        keywords = synthetic_keywords(base, size, rng)
+        
+        started = time.perf_counter()
+        index = KeywordIndex(keywords)
+        build_ms = (time.perf_counter() - started) * 1e3
+        
+        loop_us = time_per_call(lambda p: substring_loop(keywords, p), problems, args.repeat)
+        index_us = time_per_call(index.match, problems, args.repeat)
+        print(f"{size:>9} {loop_us:>10.2f} {index_us:>10.2f} {build_ms:>9.2f} {loop_us / index_us:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Serialization cost of one 100-package page.
+
+"before" is the old path: a dict per package built from row attributes,
+FastAPI's jsonable_encoder, then Starlette's JSONResponse rendering.
+"after" builds PackageSummary objects and renders them once with
+FastJSONResponse (orjson when installed), and with the stdlib fallback.
+
+    python -m benchmarks.bench_serialization [--page-size 100] [--rounds 2000]
+"""
+import argparse
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from catalog import build_catalog_snapshot
+from seed import PACKAGE_NAMES, package_rows
+from serialization import JSON_BACKEND, orjson, orjson_dumps, stdlib_dumps, summarize_all
+
+def page_payload(packages):
+    return {
+        "pagination": {"page": 1, "page_size": len(packages), "total": len(packages), "has_next": False},
+        "packages": packages
+    }
+
+def before(rows):
+    payload = page_payload([
+        {
+            "id": pkg.id,
+            "name": pkg.name,
+            "category": pkg.category,
+            "description": pkg.description
+        }
+        for pkg in rows
+    ])
+    return JSONResponse(jsonable_encoder(payload)).body
+
+def after_with(dumps):
+    def render(rows):
+        return dumps(page_payload(summarize_all(rows)))
+    return render
+
+def time_per_page(render, rows, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        render(rows)
+    return (time.perf_counter() - started) / rounds * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization per page")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    
+    snapshot = build_catalog_snapshot(1, list(package_rows(PACKAGE_NAMES[:args.page_size])))
+    rows = [snapshot.row(position) for position in range(len(snapshot))]
+    
+    variants = [("before (dicts + jsonable_encoder + json)", before)]
+    variants.append(("after (summaries + json)", after_with(stdlib_dumps)))
+    if orjson is not None:
+        variants.append(("after (summaries + orjson)", after_with(orjson_dumps)))
+    
+    assert len({render(rows) for _, render in variants}) == 1, "encoders disagree"
+    
+    print(f"{len(rows)} packages per page, default backend: {JSON_BACKEND}")
+    baseline = None
+    for label, render in variants:
+        micros = time_per_page(render, rows, args.rounds)
+        baseline = baseline or micros
+        print(f"{label:<42} {micros:>9.1f} µs/page  {baseline / micros:>5.1f}x")
+
+if __name__ == "__main__":
+    main()
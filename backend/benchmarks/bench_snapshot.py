@@ -0,0 +1,128 @@
+"""
+Memory and latency of the catalog snapshot versus the database path.
+
+For each size a synthetic catalog is built as a CatalogSnapshot, and,
+for memory only, as the list of per-package dicts the handlers used to
+produce from ORM rows. The snapshot is timed serving category pages and
+diagnose-style name lookups. With --database the packages table in
+DATABASE_URL is first synced to the same catalog (through seed.py, as
+benchmarks.load does), and the category_page and diagnose_packages
+statements are timed on the same pages and lookups.
+
+    python -m benchmarks.bench_snapshot [--sizes 1758 50000 200000] [--database]
+
+--database rewrites the packages table; never point it at a database you
+care about.
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+
+from benchmarks.catalog_gen import synthetic_names
+from catalog import build_catalog_snapshot
+from seed import package_rows
+
+def measure(build):
+    """Return (result, bytes retained by it)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, retained
+
+def time_per_call(fn, args_list) -> float:
+    started = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - started) / len(args_list) * 1e6
+
+async def time_database(names, page_args, page_size: int, lookup_args):
+    """Sync the table to `names`, then (µs per page, µs per lookup) through the database."""
+    from database import read_connection
+    from queries import QUERIES
+    from seed import seed_database
+    
+    await seed_database(names, sync=True)
+    async with read_connection() as conn:
+        started = time.perf_counter()
+        for category, offset in page_args:
+            result = await QUERIES.execute(
+                conn, "category_page",
+                {"category": category, "limit": page_size + 1, "offset": offset}
+            )
+            [
+                {"id": pkg.id, "name": pkg.name, "category": pkg.category, "description": pkg.description}
+                for pkg in result.all()
+            ]
+        page_us = (time.perf_counter() - started) / len(page_args) * 1e6
+    
+        started = time.perf_counter()
+        for (lookup_names,) in lookup_args:
+            result = await QUERIES.execute(conn, "diagnose_packages", {"names": lookup_names})
+            {pkg.name: pkg for pkg in result}
+        lookup_us = (time.perf_counter() - started) / len(lookup_args) * 1e6
+    return page_us, lookup_us
+
+async def run(args):
+    rng = random.Random(args.seed)
+    print(
+        f"{'packages':>9} {'dict B/pkg':>11} {'snap B/pkg':>11} {'snap page µs':>13} "
+        f"{'db page µs':>11} {'snap lookup µs':>15} {'db lookup µs':>13}"
+    )
+    for size in args.sizes:
+        names = synthetic_names(size, args.seed)
+    
+        # Rows are generated inside each measurement so both sides pay for
+        # their own description strings
+        _, dict_bytes = measure(lambda: [
+            {"id": row[0], "name": row[1], "category": row[2], "description": row[3]}
+            for row in package_rows(names)
+        ])
+        snapshot, snapshot_bytes = measure(lambda: build_catalog_snapshot(1, list(package_rows(names))))
+    
+        categories = [entry["name"] for entry in snapshot.category_counts()]
+        page_args = [
+            (rng.choice(categories), rng.randrange(0, 200, args.page_size))
+            for _ in range(args.lookups)
+        ]
+        lookup_args = [(rng.sample(snapshot.names, 5),) for _ in range(args.lookups)]
+    
+        def snapshot_page(category, offset):
+            return [
+                row.as_dict()
+                for row in snapshot.category_page(category, args.page_size + 1, offset=offset)
+            ]
+    
+        snapshot_us = time_per_call(snapshot_page, page_args)
+        lookup_us = time_per_call(snapshot.lookup, lookup_args)
+    
+        database_page, database_lookup = "-", "-"
+        if args.database:
+            page_us, db_lookup_us = await time_database(
+                names, page_args[:args.database_calls], args.page_size, lookup_args[:args.database_calls]
+            )
+            database_page, database_lookup = f"{page_us:.1f}", f"{db_lookup_us:.1f}"
+    
+        print(
+            f"{size:>9} {dict_bytes / size:>11.0f} {snapshot_bytes / size:>11.0f} {snapshot_us:>13.2f} "
+            f"{database_page:>11} {lookup_us:>15.2f} {database_lookup:>13}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory catalog snapshot")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1758, 50000, 200000])
+    parser.add_argument("--page-size", type=int, default=30)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--database", action="store_true", help="sync DATABASE_URL to each size and time the SQL path too")
+    parser.add_argument("--database-calls", type=int, default=500, help="pages and lookups timed against the database")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    # One event loop for every size, so the database pool is reused
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
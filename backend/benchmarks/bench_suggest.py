@@ -0,0 +1,49 @@
+"""
+Micro-benchmark for the /api/suggest prefix index.
+
+Builds SuggestIndex over synthetic catalogs of increasing size and times
+prefix lookups of varying selectivity.
+
+    python -m benchmarks.bench_suggest [--sizes 1758 50000 500000]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.catalog_gen import synthetic_names
+from categorizer import categorize_many
+from suggest import build_suggest_index
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the /api/suggest prefix index")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1758, 50000, 500000])
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    print(f"{'packages':>9} {'build ms':>9} {'1-char µs':>10} {'3-char µs':>10} {'full µs':>9}")
+    for size in args.sizes:
+        names = synthetic_names(size, args.seed)
+        categories = categorize_many(names)
+        
+        started = time.perf_counter()
+        index = build_suggest_index(1, names, categories)
+        build_ms = (time.perf_counter() - started) * 1e3
+        
+        timings = []
+        for length in (1, 3, None):
+            prefixes = [
+                name[:length] if length else name
+                for name in rng.choices(names, k=args.lookups)
+            ]
+            started = time.perf_counter()
+            for prefix in prefixes:
+                index.lookup(prefix, args.limit)
+            timings.append((time.perf_counter() - started) / len(prefixes) * 1e6)
+        
+        print(f"{size:>9} {build_ms:>9.1f} {timings[0]:>10.2f} {timings[1]:>10.2f} {timings[2]:>9.2f}")
+
+if __name__ == "__main__":
+    main()
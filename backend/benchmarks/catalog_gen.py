@@ -0,0 +1,94 @@
+"""
+Deterministic synthetic package catalogs of any size.
+
+The real PACKAGE_NAMES come first; beyond those, names are composed the
+way Arch and AUR names are: a language/ecosystem prefix (python-, perl-,
+lib32-, ...), a stem taken from a real package or built from syllables,
+and an optional AUR-style suffix (-git, -bin, ...), with weights roughly
+matching the official repos plus the AUR. Categories and descriptions
+come from the seeder's own categorize/generate_description, so the rows
+are exactly what seed.py would load for those names.
+
+    python -m benchmarks.catalog_gen 50000 [--seed 0] > names.txt
+"""
+import argparse
+import random
+from typing import Iterator, List, Tuple
+
+from seed import PACKAGE_NAMES, package_rows
+
+PREFIXES = [
+    ("", 44), ("python-", 18), ("lib", 7), ("haskell-", 4), ("perl-", 4),
+    ("lib32-", 3), ("ruby-", 2), ("nodejs-", 2), ("rust-", 1), ("go-", 1),
+    ("ttf-", 1), ("otf-", 1), ("r-", 1), ("qt6-", 1), ("kf6-", 1),
+    ("xorg-", 1), ("gst-plugin-", 1), ("texlive-", 1), ("vim-", 1),
+    ("gnome-", 1), ("php-", 1),
+]
+SUFFIXES = [
+    ("", 70), ("-git", 14), ("-bin", 6), ("-docs", 2), ("-utils", 2),
+    ("-qt", 1), ("-gtk", 1), ("-nox", 1), ("-lts", 1), ("-devel", 1),
+    ("-cli", 1),
+]
+SYLLABLES = [
+    "ar", "ba", "bel", "co", "da", "del", "fi", "flux", "ga", "gen", "io",
+    "ka", "kit", "la", "lo", "ma", "mon", "na", "net", "no", "pa", "ply",
+    "qu", "ra", "re", "sa", "shell", "ta", "to", "tron", "ui", "va", "vi",
+    "wa", "xa", "ya", "zo", "zen",
+]
+
+def _weighted(options: List[Tuple[str, int]]):
+    values = [value for value, _ in options]
+    weights = [weight for _, weight in options]
+    return lambda rng: rng.choices(values, weights)[0]
+
+_prefix = _weighted(PREFIXES)
+_suffix = _weighted(SUFFIXES)
+_KNOWN_PREFIXES = tuple(prefix for prefix, _ in PREFIXES if prefix)
+
+def _stem(rng: random.Random) -> str:
+    if rng.random() < 0.6:
+        stem = rng.choice(PACKAGE_NAMES)
+        for prefix in _KNOWN_PREFIXES:
+            if stem.startswith(prefix) and len(stem) > len(prefix):
+                return stem[len(prefix):]
+        return stem
+    word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    if rng.random() < 0.2:
+        word += "-" + "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 2)))
+    return word
+
+def synthetic_names(size: int, seed: int = 0) -> List[str]:
+    """`size` unique package names; the same (size, seed) always gives the same list."""
+    rng = random.Random(seed)
+    names = list(PACKAGE_NAMES[:size])
+    seen = set(names)
+    while len(names) < size:
+        name = f"{_prefix(rng)}{_stem(rng)}{_suffix(rng)}"
+        if name in seen:
+            # Popular stems collide; versioned forms (gtk2/gtk3, python311) are common too
+            name = f"{name}{rng.randint(2, 99)}"
+            if name in seen:
+                continue
+        seen.add(name)
+        names.append(name)
+    return names
+
+def synthetic_catalog(size: int, seed: int = 0) -> Iterator[Tuple[int, str, str, str]]:
+    """(id, name, category, description) rows, as seed.py would load them."""
+    return package_rows(synthetic_names(size, seed))
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a synthetic package catalog, one name per line")
+    parser.add_argument("size", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows", action="store_true", help="print tab-separated id, name, category, description")
+    args = parser.parse_args()
+    
+    if args.rows:
+        for row in synthetic_catalog(args.size, args.seed):
+            print("\t".join(str(value) for value in row))
+    else:
+        print("\n".join(synthetic_names(args.size, args.seed)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Load driver for every API endpoint, across catalog sizes.
+
+For each dataset size the packages table is synced to a synthetic catalog
+of that size (benchmarks.catalog_gen, loaded through seed.py). Then each
+endpoint is hit with `--requests` requests, `--concurrency` at a time.
+Throughput and p50/p95/p99 latency are printed per endpoint and size,
+and everything is saved as JSON so runs can be compared over time.
+
+By default the app runs in-process through httpx's ASGI transport, with
+its startup hooks called directly. With --url the same requests go to a
+running server instead (e.g. a local uvicorn).
+
+    python -m benchmarks.load --sizes 1758 50000 --seed-database
+    python -m benchmarks.load --url http://localhost:8000 --endpoints search_fts diagnose
+
+--seed-database rewrites the packages table in DATABASE_URL; never point
+it at a database you care about. Without it the current data is used,
+once, labelled with its row count. The response cache is off unless
+--response-cache is given, so repeated requests measure the handlers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from benchmarks.catalog_gen import synthetic_names
+from categorizer import categorize_many
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+PROBLEMS = [
+    "wifi keeps disconnecting after suspend",
+    "no sound from headphones",
+    "bluetooth mouse not connecting",
+    "screen tearing on external monitor",
+    "laptop battery drains fast",
+    "printer not found",
+    "system fails to boot after update",
+    "audio crackling in games",
+    "display flicker with nvidia driver",
+    "cannot mount usb drive",
+]
+
+# (method, path, query params, json body); query values go through httpx's
+# params so names with '&', '+', '#' or '?' are encoded
+RequestSpec = Tuple[str, str, Optional[Dict], Optional[Dict]]
+
+class Sample:
+    """What the request builders draw from: names and categories in the loaded catalog."""
+    
+    def __init__(self, names: List[str], categories: List[str]):
+        self.names = names
+        self.categories = categories
+        self.words = sorted({part for name in names for part in name.split("-") if len(part) > 3})
+
+def _typo(rng: random.Random, name: str) -> str:
+    if len(name) < 4:
+        return name
+    i = rng.randrange(1, len(name) - 1)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+ENDPOINTS: Dict[str, Callable[[random.Random, Sample], RequestSpec]] = {
+    "root": lambda rng, s: ("GET", "/", None, None),
+    "health": lambda rng, s: ("GET", "/health", None, None),
+    "categories": lambda rng, s: ("GET", "/api/categories", None, None),
+    "packages": lambda rng, s: (
+        "GET", f"/api/packages/{quote(rng.choice(s.categories), safe='')}",
+        {"page": rng.randint(1, 3), "page_size": 30}, None
+    ),
+    "search_fts": lambda rng, s: ("GET", "/api/search", {"q": rng.choice(s.words)}, None),
+    "search_fuzzy": lambda rng, s: (
+        "GET", "/api/search", {"q": _typo(rng, rng.choice(s.names)), "mode": "fuzzy"}, None
+    ),
+    "search_estimate": lambda rng, s: (
+        "GET", "/api/search", {"q": rng.choice(s.words), "count": "estimate"}, None
+    ),
+    "suggest": lambda rng, s: ("GET", "/api/suggest", {"prefix": rng.choice(s.names)[:3]}, None),
+    "export": lambda rng, s: (
+        "GET", "/api/export", {"format": "ndjson", "category": rng.choice(s.categories)}, None
+    ),
+    "diagnose": lambda rng, s: ("POST", "/api/diagnose", None, {"problem": rng.choice(PROBLEMS)}),
+    "diagnose_batch": lambda rng, s: (
+        "POST", "/api/diagnose/batch", None, {"problems": rng.choices(PROBLEMS, k=50)}
+    ),
+    "cache_stats": lambda rng, s: ("GET", "/api/cache/stats", None, None),
+    "metrics": lambda rng, s: ("GET", "/metrics", None, None),
+    "metrics_pool": lambda rng, s: ("GET", "/metrics/pool", None, None),
+    "metrics_queries": lambda rng, s: ("GET", "/metrics/queries", None, None),
+    "admin_rules": lambda rng, s: ("GET", "/api/admin/rules", None, None),
+}
+
+def percentile(ordered: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    rank = max(1, min(len(ordered), round(q * len(ordered) + 0.5)))
+    return round(ordered[rank - 1], 3)
+
+async def run_endpoint(client, specs: List[RequestSpec], concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(specs)
+    
+    async def worker():
+        nonlocal errors
+        for method, path, params, body in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, params=params, json=body)
+                failed = response.status_code >= 500
+            except httpx.HTTPError:
+                failed = True
+            latencies.append((time.perf_counter() - started) * 1e3)
+            errors += failed
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+async def load_dataset(size: int, seed: int) -> List[str]:
+    from seed import seed_database
+    
+    names = synthetic_names(size, seed)
+    await seed_database(names, sync=True)
+    return names
+
+async def current_dataset(client, seed: int) -> Tuple[int, List[str]]:
+    """Row count of the loaded catalog, and its names assuming it was generated with `seed`."""
+    response = await client.get("/api/categories")
+    response.raise_for_status()
+    size = sum(category["count"] for category in response.json())
+    return size, synthetic_names(size, seed)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args) -> Dict:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        api = None
+    else:
+        if not args.response_cache:
+            os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+        import main as api
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=api.app), base_url="http://bench", timeout=args.timeout
+        )
+    
+    rng = random.Random(args.seed)
+    results = []
+    try:
+        for size in (args.sizes if args.seed_database else [None]):
+            if size is not None:
+                names = await load_dataset(size, args.seed)
+            if api is not None:
+                # Lifespan events don't run under ASGITransport
+                await api.startup()
+            if size is None:
+                size, names = await current_dataset(client, args.seed)
+            sample = Sample(names, sorted(set(categorize_many(names))))
+    
+            print(f"\n{size:,} packages")
+            print(f"{'endpoint':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for endpoint in args.endpoints:
+                build = ENDPOINTS[endpoint]
+                specs = [build(rng, sample) for _ in range(args.requests)]
+                # A short warm-up so pools, prepared statements and indexes are hot
+                await run_endpoint(client, specs[:args.concurrency], args.concurrency)
+                stats = await run_endpoint(client, specs, args.concurrency)
+                results.append({"size": size, "endpoint": endpoint, **stats})
+                print(
+                    f"{endpoint:<16} {stats['throughput_rps']:>9.1f} {stats['p50_ms']:>9.2f} "
+                    f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['errors']:>7}"
+                )
+            if api is not None:
+                await api.shutdown()
+    finally:
+        await client.aclose()
+    
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "target": args.url or "asgi",
+        "response_cache": None if args.url else args.response_cache,
+        "concurrency": args.concurrency,
+        "requests_per_endpoint": args.requests,
+        "seed": args.seed,
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test every API endpoint across catalog sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1758, 50000, 500000])
+    parser.add_argument("--seed-database", action="store_true", help="sync DATABASE_URL to each synthetic size first")
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--url", help="target a running server instead of the in-process app")
+    parser.add_argument("--response-cache", action="store_true", help="keep the response cache on (in-process only)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results path (default: benchmarks/results/load-<timestamp>.json)")
+    args = parser.parse_args()
+    
+    if httpx is None:
+        raise SystemExit("benchmarks.load needs httpx: pip install httpx")
+    
+    report = asyncio.run(run(args))
+    
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results",
+        f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📝 Results written to {output}")
+
+if __name__ == "__main__":
+    main()
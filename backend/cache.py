@@ -0,0 +1,311 @@
+"""
+In-process response cache for the read-only API endpoints.
+
+Responses are keyed on the request path plus its sorted query string and
+expire after a TTL or when evicted by LRU. Entries are tagged with the
+dataset version written by seed.py, so a reseed invalidates everything.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+from urllib.parse import parse_qsl, urlencode
+
+from sqlalchemy import text
+
+CacheKey = Tuple[str, str]
+CachedResponse = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+T = TypeVar("T")
+
+async def read_dataset_version(session) -> int:
+    """Current dataset version, or 0 if the seeder never recorded one."""
+    result = await session.execute(text("SELECT version FROM dataset_version WHERE id = 1"))
+    return result.scalar() or 0
+
+async def read_snapshot_version(conn) -> int:
+    """
+    Pin `conn` to a single database snapshot and return its dataset version.
+
+    Call it before anything else runs on the connection. The statements
+    that follow then see exactly the data that version describes, even
+    on a replica that is still replaying a seed.
+    """
+    await conn.execution_options(isolation_level="REPEATABLE READ")
+    return await read_dataset_version(conn)
+
+async def bump_dataset_version(session) -> int:
+    """Advance the dataset version so API caches drop their entries."""
+    result = await session.execute(text("""
+        INSERT INTO dataset_version (id, version) VALUES (1, 1)
+        ON CONFLICT (id) DO UPDATE SET version = dataset_version.version + 1
+        RETURNING version
+    """))
+    return result.scalar()
+
+class DatasetVersionMonitor:
+    """
+    Tracks the dataset version.
+
+    A background task (start_watching) polls the database every
+    `check_interval` seconds; current() only reads the last value, so no
+    request ever waits on the poll, even when the database is down.
+    """
+    
+    def __init__(self, loader: Callable[[], Awaitable[int]], check_interval: float = 5.0):
+        self.loader = loader
+        self.check_interval = check_interval
+        self.version = 0
+        self._watcher: Optional[asyncio.Task] = None
+    
+    async def current(self) -> int:
+        return self.version
+    
+    async def refresh(self) -> int:
+        """Poll the database once."""
+        try:
+            self.version = await self.loader()
+        except Exception:
+            # Keep serving the last known version rather than fail requests
+            pass
+        return self.version
+    
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.refresh()
+    
+    def start_watching(self):
+        """Poll every `check_interval` seconds in the background; 0 disables polling."""
+        if self._watcher is None and self.check_interval > 0:
+            self._watcher = asyncio.create_task(self._watch())
+    
+    async def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+class VersionedSnapshot(Generic[T]):
+    """
+    Holds a value built for one dataset version and rebuilds it when the
+    version moves.
+
+    `loader()` builds the value and stamps it with the dataset version
+    read on the connection it loaded from (see read_snapshot_version),
+    so a replica that has not replayed a seed yet yields a value marked
+    with the older version. Readers get the held value without locking
+    while it is current. A rebuild runs once under a lock and then
+    replaces the value wholesale, so callers never see a partially built
+    value. If a rebuild still comes back older than the monitored
+    version, the next attempt waits one check interval, so a lagging
+    replica is not reloaded on every request.
+    """
+    
+    def __init__(self, loader: Callable[[], Awaitable[T]], version_monitor: DatasetVersionMonitor):
+        self.loader = loader
+        self.version_monitor = version_monitor
+        self.value: Optional[T] = None
+        self._lock = asyncio.Lock()
+        self._retry_at = float('-inf')
+    
+    async def reload(self) -> T:
+        """Rebuild the value and swap it in."""
+        self.value = await self.loader()
+        return self.value
+    
+    def _stale(self, value: Optional[T], version: int) -> bool:
+        if value is None:
+            return True
+        return value.version != version and time.monotonic() >= self._retry_at
+    
+    async def current(self) -> T:
+        """Return the value for the current dataset version."""
+        version = await self.version_monitor.current()
+        value = self.value
+        if not self._stale(value, version):
+            return value
+        async with self._lock:
+            value = self.value
+            if self._stale(value, version):
+                value = await self.reload()
+                if value.version != version:
+                    self._retry_at = time.monotonic() + self.version_monitor.check_interval
+        return value
+
+class ResponseCache:
+    """TTL + LRU store of finished responses with single-flight misses."""
+    
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: float = 300.0,
+        version_monitor: Optional[DatasetVersionMonitor] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_monitor = version_monitor
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int, CachedResponse]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+    
+    @staticmethod
+    def make_key(path: str, query_string: str) -> CacheKey:
+        """Normalize the query so parameter order does not split entries."""
+        params = sorted(parse_qsl(query_string, keep_blank_values=True))
+        return path.rstrip('/') or '/', urlencode(params)
+    
+    async def refresh_version(self):
+        """Drop all entries once the dataset version moves."""
+        if self.version_monitor is None:
+            return
+        version = await self.version_monitor.current()
+        if version != self.version:
+            self.invalidate(version)
+    
+    def invalidate(self, version: Optional[int] = None):
+        """Drop every entry, optionally moving to a new dataset version."""
+        if version is not None:
+            self.version = version
+        self._entries.clear()
+    
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, version, response = entry
+        if version != self.version or expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+    
+    def set(self, key: CacheKey, response: CachedResponse, version: int):
+        if version != self.version:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, version, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    async def get_or_compute(
+        self,
+        key: CacheKey,
+        compute: Callable[[], Awaitable[Optional[CachedResponse]]]
+    ) -> Tuple[Optional[CachedResponse], bool]:
+        """
+        Return (response, hit). Concurrent misses on the same key wait for
+        the first caller instead of all running `compute`.
+        """
+        await self.refresh_version()
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+        
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            response = await asyncio.shield(pending)
+            if response is not None:
+                self.hits += 1
+                return response, True
+        
+        self.misses += 1
+        version = self.version
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await compute()
+            if response is not None:
+                self.set(key, response, version)
+            future.set_result(response)
+            return response, False
+        except BaseException:
+            future.set_result(None)
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "dataset_version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving cached GET responses for the given path prefixes."""
+    
+    def __init__(self, app, cache: ResponseCache, prefixes: Tuple[str, ...]):
+        self.app = app
+        self.cache = cache
+        self.prefixes = prefixes
+    
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(self.prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        key = self.cache.make_key(scope["path"], scope["query_string"].decode('latin-1'))
+        sent = False
+        
+        async def compute() -> Optional[CachedResponse]:
+            nonlocal sent
+            status = 500
+            headers: List[Tuple[bytes, bytes]] = []
+            body = []
+            
+            async def capture(message):
+                nonlocal status, headers
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    headers = [
+                        (name, value) for name, value in message.get("headers", [])
+                        if name.lower() != b"x-cache"
+                    ]
+                    message = {
+                        **message,
+                        "headers": headers + [(b"x-cache", b"MISS")]
+                    }
+                elif message["type"] == "http.response.body":
+                    body.append(message.get("body", b""))
+                await send(message)
+            
+            sent = True
+            await self.app(scope, receive, capture)
+            return (status, headers, b"".join(body)) if status == 200 else None
+        
+        response, hit = await self.cache.get_or_compute(key, compute)
+        if sent:
+            return
+        if response is None:
+            await self.app(scope, receive, send)
+            return
+        
+        status, headers, body = response
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": headers + [(b"x-cache", b"HIT")]
+        })
+        await send({"type": "http.response.body", "body": body})
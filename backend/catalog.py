@@ -0,0 +1,153 @@
+"""
+Columnar in-memory snapshot of the packages table.
+
+The catalog only changes when seed.py runs, so in snapshot serving mode
+(CATALOG_SNAPSHOT=true) the category listing, category counts and the
+diagnose name lookups are answered from memory instead of the database.
+
+Rows are stored column-wise and sorted by (category, name):
+
+- ids in an array('l')
+- names in a plain list (the strings are needed as-is for responses)
+- one small category code per row in an array('H'), indexing a list of
+  interned category names
+- all descriptions concatenated into one str, sliced by an array of offsets
+
+Each category therefore occupies one contiguous, name-sorted slice, so a
+page is a bisect for the cursor plus a slice. Python compares strings by
+code point, which is the COLLATE "C" order the name columns are declared
+with (models.NAME_COLLATION), so pages and cursors match the database. Rows are materialized as
+PackageSummary objects only for the packages that end up in a response.
+"""
+import bisect
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+from cache import read_snapshot_version
+from serialization import PackageSummary
+
+class CatalogSnapshot:
+    """Immutable column store of every package for one dataset version."""
+    
+    __slots__ = (
+        "version", "ids", "names", "category_codes", "categories",
+        "category_ranges", "descriptions", "description_offsets", "_positions"
+    )
+    
+    def __init__(self, version: int, rows: Iterable[Tuple[int, str, str, str]]):
+        # Sort in Python so the slices agree with bisect's ordering
+        ordered = sorted(rows, key=lambda row: (row[2], row[1]))
+    
+        self.version = version
+        self.ids = array('l', (row[0] for row in ordered))
+        self.names: List[str] = [sys.intern(row[1]) for row in ordered]
+        self.categories: List[str] = []
+        self.category_ranges: Dict[str, Tuple[int, int]] = {}
+        self.category_codes = array('H')
+    
+        for position, row in enumerate(ordered):
+            category = row[2]
+            span = self.category_ranges.get(category)
+            if span is None:
+                self.categories.append(sys.intern(category))
+                span = (position, position)
+            self.category_ranges[category] = (span[0], position + 1)
+            self.category_codes.append(len(self.categories) - 1)
+    
+        self.description_offsets = array('L', [0])
+        parts = []
+        end = 0
+        for row in ordered:
+            end += len(row[3])
+            self.description_offsets.append(end)
+            parts.append(row[3])
+        self.descriptions = "".join(parts)
+    
+        self._positions = {name: position for position, name in enumerate(self.names)}
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def row(self, position: int) -> PackageSummary:
+        offsets = self.description_offsets
+        return PackageSummary(
+            self.ids[position],
+            self.names[position],
+            self.categories[self.category_codes[position]],
+            self.descriptions[offsets[position]:offsets[position + 1]]
+        )
+    
+    def category_counts(self) -> List[Dict]:
+        """[{"name", "count"}] for every category, ordered by name."""
+        return [
+            {"name": category, "count": end - start}
+            for category, (start, end) in sorted(self.category_ranges.items())
+        ]
+    
+    def category_count(self, category: str) -> int:
+        start, end = self.category_ranges.get(category, (0, 0))
+        return end - start
+    
+    def category_page(
+        self,
+        category: str,
+        limit: int,
+        offset: int = 0,
+        after: Optional[str] = None,
+        before: Optional[str] = None
+    ) -> List[PackageSummary]:
+        """
+        Rows of one category, mirroring the category_page statement.
+    
+        `after` returns up to `limit` rows following that name, `before` up
+        to `limit` rows preceding it in descending order; otherwise rows are
+        taken from `offset`.
+        """
+        start, end = self.category_ranges.get(category, (0, 0))
+        if before is not None:
+            stop = bisect.bisect_left(self.names, before, start, end)
+            positions = range(stop - 1, max(start, stop - limit) - 1, -1)
+        else:
+            if after is not None:
+                first = bisect.bisect_right(self.names, after, start, end)
+            else:
+                first = min(start + offset, end)
+            positions = range(first, min(first + limit, end))
+        return [self.row(position) for position in positions]
+    
+    def lookup(self, names: Iterable[str]) -> Dict[str, PackageSummary]:
+        """PackageSummary for each of `names` that exists."""
+        positions = self._positions
+        return {
+            name: self.row(positions[name])
+            for name in names if name in positions
+        }
+    
+    def memory_bytes(self) -> int:
+        """Approximate footprint of the columns (excluding the shared name strings)."""
+        return (
+            sys.getsizeof(self.ids)
+            + sys.getsizeof(self.names)
+            + sys.getsizeof(self.category_codes)
+            + sys.getsizeof(self.descriptions)
+            + sys.getsizeof(self.description_offsets)
+            + sys.getsizeof(self._positions)
+        )
+
+def build_catalog_snapshot(version: int, rows: Sequence[Tuple[int, str, str, str]]) -> CatalogSnapshot:
+    return CatalogSnapshot(version, rows)
+
+async def load_catalog(connect) -> CatalogSnapshot:
+    """Loader for a VersionedSnapshot holding the catalog."""
+    async with connect() as conn:
+        version = await read_snapshot_version(conn)
+        result = await conn.execute(text("""
+            SELECT p.id, p.name, c.name AS category, p.description
+            FROM packages p
+            JOIN categories c ON c.id = p.category_id
+        """))
+        rows = [tuple(row) for row in result]
+    return build_catalog_snapshot(version, rows)
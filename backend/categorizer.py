@@ -1,6 +1,7 @@
 """
 Intelligent package categorizer based on name patterns and heuristics.
 """
+from typing import Dict, Iterable, List
 
 CATEGORY_PATTERNS = {
     'System Core': [
@@ -205,19 +206,56 @@ CATEGORY_PATTERNS = {
     ]
 }
 
-def categorize_package(package_name: str) -> str:
+def _build_matcher(category_patterns: Dict[str, List[str]]):
     """
-    Categorize a package based on its name using pattern matching.
+    Compile every pattern into a single Aho-Corasick automaton.
+
+    Each state carries the lowest category rank (dict order) of any pattern
+    ending there, so one pass over a name yields the same winner as the
+    category-by-category substring scan.
     """
-    name_lower = package_name.lower()
-    
-    # Check each category's patterns
-    for category, patterns in CATEGORY_PATTERNS.items():
+    categories = list(category_patterns)
+    goto: List[Dict[str, int]] = [{}]
+    best: List[int] = [_NO_MATCH]
+
+    for rank, patterns in enumerate(category_patterns.values()):
         for pattern in patterns:
-            if pattern in name_lower:
-                return category
-    
-    # Default categorization for remaining packages
+            state = 0
+            for char in pattern:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][char] = nxt
+                    goto.append({})
+                    best.append(_NO_MATCH)
+                state = nxt
+            best[state] = min(best[state], rank)
+
+    # Breadth-first pass: wire failure links and fold suffix outputs into
+    # each state, then copy the failure state's edges (root excluded) so the
+    # matcher never has to walk the failure chain.
+    order = [0]
+    for state in order:
+        order.extend(goto[state].values())
+
+    fail = [0] * len(goto)
+    for state in order:
+        for char, nxt in goto[state].items():
+            link = fail[state]
+            while state and link and char not in goto[link]:
+                link = fail[link]
+            fail[nxt] = goto[link].get(char, 0) if state else 0
+            best[nxt] = min(best[nxt], best[fail[nxt]])
+
+    for state in order[1:]:
+        if fail[state]:
+            for char, nxt in goto[fail[state]].items():
+                goto[state].setdefault(char, nxt)
+
+    return categories, goto, best
+
+def _fallback_category(name_lower: str) -> str:
+    """Default categorization for packages that match no pattern."""
     if name_lower.startswith('lib'):
         return 'Core Libraries (Low-Level)'
     elif 'python-' in name_lower:
@@ -229,6 +267,49 @@ def categorize_package(package_name: str) -> str:
     else:
         return 'Core Libraries (Low-Level)'
 
+_NO_MATCH = len(CATEGORY_PATTERNS)
+_CATEGORIES, _GOTO, _BEST = _build_matcher(CATEGORY_PATTERNS)
+
+def _match_rank(name_lower: str) -> int:
+    goto = _GOTO
+    best = _BEST
+    root = goto[0]
+    state = 0
+    rank = _NO_MATCH
+    for char in name_lower:
+        state = goto[state].get(char) or root.get(char, 0)
+        if best[state] < rank:
+            rank = best[state]
+            if rank == 0:
+                break
+    return rank
+
+def categorize_package(package_name: str) -> str:
+    """
+    Categorize a package based on its name using pattern matching.
+    """
+    name_lower = package_name.lower()
+    rank = _match_rank(name_lower)
+    if rank != _NO_MATCH:
+        return _CATEGORIES[rank]
+    return _fallback_category(name_lower)
+
+def categorize_many(package_names: Iterable[str]) -> List[str]:
+    """
+    Categorize a batch of package names in a single pass.
+
+    Results are returned in input order; repeated names are matched once.
+    """
+    seen: Dict[str, str] = {}
+    results = []
+    for package_name in package_names:
+        category = seen.get(package_name)
+        if category is None:
+            category = categorize_package(package_name)
+            seen[package_name] = category
+        results.append(category)
+    return results
+
 def generate_description(package_name: str, category: str) -> str:
     """
     Generate a plausible description for a package based on its name and category.
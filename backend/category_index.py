@@ -0,0 +1,61 @@
+"""
+In-memory snapshot of the category list served by /api/categories.
+
+The snapshot is built from one GROUP BY query, pre-encoded to JSON with an
+ETag, and replaced wholesale when the dataset version changes, so readers
+always see either the old or the new list and never a mix.
+"""
+import hashlib
+import json
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select, func
+
+from cache import read_snapshot_version
+from models import Category, Package
+
+class CategorySnapshot(NamedTuple):
+    version: int
+    categories: List[Dict]
+    body: bytes
+    etag: str
+
+def build_snapshot(version: int, categories: List[Dict]) -> CategorySnapshot:
+    body = json.dumps(categories, separators=(',', ':')).encode('utf-8')
+    etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+    return CategorySnapshot(version, categories, body, etag)
+
+async def load_categories(connect, catalog=None) -> CategorySnapshot:
+    """
+    Loader for a VersionedSnapshot holding the category list.
+
+    With `catalog` (the catalog VersionedSnapshot) the counts come from
+    memory instead of a GROUP BY over the packages table.
+    """
+    if catalog is not None:
+        snapshot = await catalog.current()
+        return build_snapshot(snapshot.version, snapshot.category_counts())
+    
+    query = select(
+        Category.name,
+        func.count(Package.id).label('count')
+    ).join(Package, Package.category_id == Category.id).group_by(Category.name).order_by(Category.name)
+    
+    async with connect() as conn:
+        version = await read_snapshot_version(conn)
+        result = await conn.execute(query)
+        categories = [
+            {"name": row.name, "count": row.count}
+            for row in result.all()
+        ]
+    return build_snapshot(version, categories)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against the snapshot ETag."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
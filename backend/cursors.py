@@ -0,0 +1,28 @@
+"""
+Opaque cursor tokens for keyset pagination.
+"""
+import base64
+import json
+from typing import Any, List
+
+def encode_cursor(*values: Any) -> str:
+    """Pack the sort-key values of a row into a URL-safe token."""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """
+    Unpack a token produced by encode_cursor.
+
+    Raises ValueError if the token is malformed or does not carry exactly
+    `size` values.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeEncodeError):
+        raise ValueError("Malformed pagination cursor")
+    
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Malformed pagination cursor")
+    return values
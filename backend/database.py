@@ -1,21 +1,253 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from contextlib import asynccontextmanager
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncConnection, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from timing import record_query
+import itertools
 import os
+import threading
+import time
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql+asyncpg://archlens:archlens_password@db:5432/archlens"
 )
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# Optional comma-separated replicas for the read endpoints; writes and the
+# seeder always use DATABASE_URL
+DATABASE_READ_URLS = [url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()]
+
+# Pool tuning, all overridable from the environment (applies to every engine)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+REPLICA_EJECT_SECONDS = float(os.getenv("DB_REPLICA_EJECT_SECONDS", "30"))
+
+class PoolStats:
+    """Counters fed by the instrumented pool and pool events."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+    
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection."""
+    stats: PoolStats
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - started)
+        return connection
+
+def _make_engine(url: str, stats: PoolStats) -> AsyncEngine:
+    # A subclass per engine so recreated pools keep pointing at the same stats
+    pool_class = type("InstrumentedPool", (InstrumentedPool,), {"stats": stats})
+    new_engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=pool_class,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING,
+        connect_args={
+            # SQLAlchemy's per-connection prepared statement cache and asyncpg's own
+            "prepared_statement_cache_size": STATEMENT_CACHE_SIZE,
+            "statement_cache_size": STATEMENT_CACHE_SIZE
+        }
+    )
+    
+    sync_engine = new_engine.sync_engine
+    
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+    
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+    
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        stats.checkins += 1
+    
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations += 1
+    
+    # Statement timing for Server-Timing and the slow log (covers the seeder too)
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_started = time.perf_counter()
+    
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        record_query(statement, parameters, (time.perf_counter() - context.query_started) * 1e3)
+    
+    return new_engine
+
+def _pool_snapshot(target: AsyncEngine, stats: PoolStats) -> Dict:
+    """Point-in-time view of pool occupancy plus the cumulative counters."""
+    pool = target.sync_engine.pool
+    checked_out = pool.checkedout()
+    capacity = POOL_SIZE + max(MAX_OVERFLOW, 0)
+    waits = stats.checkouts or 1
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 4) if capacity else 0.0,
+        "checkouts": stats.checkouts,
+        "checkins": stats.checkins,
+        "connects": stats.connects,
+        "invalidations": stats.invalidations,
+        "timeouts": stats.timeouts,
+        "wait_seconds_total": round(stats.wait_seconds_total, 6),
+        "wait_seconds_avg": round(stats.wait_seconds_total / waits, 6),
+        "wait_seconds_max": round(stats.wait_seconds_max, 6)
+    }
+
+pool_stats = PoolStats()
+engine = _make_engine(DATABASE_URL, pool_stats)
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
+class Replica:
+    def __init__(self, url: str):
+        self.label = make_url(url).render_as_string(hide_password=True)
+        self.stats = PoolStats()
+        self.engine = _make_engine(url, self.stats)
+        self.ejected_until = 0.0
+        self.failures = 0
+    
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+class ReadRouter:
+    """
+    Round-robin over read replicas. A replica that fails to hand out a
+    connection is ejected for REPLICA_EJECT_SECONDS; with none healthy
+    (or none configured) reads go to the primary.
+    """
+    
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+    
+    def choose(self) -> Optional[Replica]:
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if replica.healthy:
+                return replica
+        return None
+    
+    def eject(self, replica: Replica, error: Exception):
+        replica.failures += 1
+        replica.ejected_until = time.monotonic() + REPLICA_EJECT_SECONDS
+        print(f"⚠️  Ejecting read replica {replica.label} for {REPLICA_EJECT_SECONDS:.0f}s: {error}")
+    
+    def status(self) -> List[Dict]:
+        return [
+            {
+                "url": replica.label,
+                "healthy": replica.healthy,
+                "failures": replica.failures,
+                "pool": _pool_snapshot(replica.engine, replica.stats)
+            }
+            for replica in self.replicas
+        ]
+
+read_router = ReadRouter(DATABASE_READ_URLS)
+
+async def _start(target: AsyncEngine) -> AsyncConnection:
+    conn = target.connect()
+    await conn.start()
+    await conn.execution_options(postgresql_readonly=True)
+    return conn
+
+@asynccontextmanager
+async def read_connection() -> AsyncIterator[AsyncConnection]:
+    """
+    Plain read-only connection for handlers that only run text() queries,
+    skipping ORM session setup and identity-map bookkeeping. Served by a
+    healthy replica when DATABASE_READ_URLS is set, otherwise the primary.
+    """
+    conn = None
+    replica = read_router.choose()
+    if replica is not None:
+        try:
+            conn = await _start(replica.engine)
+        except (exc.DBAPIError, OSError) as e:
+            read_router.eject(replica, e)
+    if conn is None:
+        conn = await _start(engine)
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
+def pool_status() -> Dict:
+    return {
+        "primary": _pool_snapshot(engine, pool_stats),
+        "replicas": read_router.status()
+    }
+
 async def get_session() -> AsyncSession:
     async with async_session_maker() as session:
         yield session
 
+async def get_read_connection() -> AsyncIterator[AsyncConnection]:
+    async with read_connection() as conn:
+        yield conn
+
+# In-place upgrades for databases created by older versions of the models,
+# run by init_db after create_all; each must be safe to run repeatedly
+SCHEMA_UPGRADES: List[Callable[[AsyncConnection], Awaitable[None]]] = []
+
+def schema_upgrade(fn):
+    SCHEMA_UPGRADES.append(fn)
+    return fn
+
+def _create_missing_indexes(sync_conn):
+    """create_all skips existing tables, so add indexes introduced since."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
 async def init_db():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        # Trigram index on packages.name backs fuzzy search
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.create_all)
+        for upgrade in SCHEMA_UPGRADES:
+            await upgrade(conn)
+        await conn.run_sync(_create_missing_indexes)
@@ -0,0 +1,317 @@
+"""
+Keyword matching and rule loading for the /api/diagnose endpoint.
+
+Diagnostic rule keywords are compiled once into a token trie: the root is a
+hash of first tokens and deeper levels hold the rest of multi-word phrases
+("virtual machine"). Matching tokenizes the problem text and walks the trie
+from each token, so keywords only match whole words ("bt" no longer fires
+inside "doubt") and the cost does not grow with the number of rules.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from itertools import chain
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+
+from serialization import summarize
+from tsquery import build_tsquery
+
+TOKEN_PATTERN = re.compile(r"\w+")
+MAX_SUGGESTIONS = 5
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class KeywordMatch(NamedTuple):
+    keywords: List[str]
+    packages: List[str]
+
+class _TrieNode:
+    __slots__ = ('children', 'rule')
+    
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.rule: Optional[int] = None
+
+def _inflections(token: str) -> List[str]:
+    """
+    Inflected forms of a keyword token that should match it.
+
+    Covers plurals and third person ("speakers", "crashes"), -ing and -ed
+    forms ("booting", "flickered"), a dropped final 'e' ("freezing",
+    "updated") and a doubled final consonant ("lagging"). Tokens shorter
+    than three letters get none, so "bt" never matches "bts" or "bted".
+    """
+    if len(token) < 3:
+        return []
+    forms = [token + 's', token + 'es', token + 'ing', token + 'ed']
+    if token.endswith('e'):
+        forms += [token[:-1] + 'ing', token + 'd']
+    elif token[-1] not in 'aeiouwxy':
+        forms += [token + token[-1] + 'ing', token + token[-1] + 'ed']
+    return forms
+
+def _add_inflections(node: _TrieNode):
+    """Point every inflected form of each child token at the same child."""
+    for token, child in list(node.children.items()):
+        _add_inflections(child)
+        for form in _inflections(token):
+            # A form that is itself a keyword token keeps its own node
+            node.children.setdefault(form, child)
+
+class KeywordIndex:
+    """Word-boundary matcher over the `keywords` section of the diagnostic rules."""
+    
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self.keywords = list(keywords)
+        self.packages = [list(packages) for packages in keywords.values()]
+        self.root = _TrieNode()
+        self.max_phrase_length = 0
+        
+        for rule, keyword in enumerate(self.keywords):
+            tokens = tokenize(keyword)
+            if not tokens:
+                continue
+            node = self.root
+            for token in tokens:
+                node = node.children.setdefault(token, _TrieNode())
+            if node.rule is None:
+                node.rule = rule
+            self.max_phrase_length = max(self.max_phrase_length, len(tokens))
+        
+        # Inflections are expanded once here so matching is one dict
+        # lookup per token
+        _add_inflections(self.root)
+    
+    def __len__(self) -> int:
+        return len(self.keywords)
+    
+    def match(self, text: str) -> KeywordMatch:
+        """
+        Find every keyword present in `text`.
+
+        Keywords come back in rule-file order and packages in the order
+        their keywords were declared, without duplicates.
+        """
+        tokens = tokenize(text)
+        rules = set()
+        root_children = self.root.children
+        max_length = self.max_phrase_length
+        for start, token in enumerate(tokens):
+            node = root_children.get(token)
+            if node is None:
+                continue
+            if node.rule is not None:
+                rules.add(node.rule)
+            # Only the first token of a multi-word keyword has children
+            position = start + 1
+            while node.children and position < len(tokens) and position - start < max_length:
+                node = node.children.get(tokens[position])
+                if node is None:
+                    break
+                if node.rule is not None:
+                    rules.add(node.rule)
+                position += 1
+        
+        ordered = sorted(rules)
+        keywords = [self.keywords[rule] for rule in ordered]
+        # dict.fromkeys drops duplicates and keeps declaration order
+        packages = list(dict.fromkeys(chain.from_iterable(self.packages[rule] for rule in ordered)))
+        return KeywordMatch(keywords, packages)
+
+def search_term_for(problem: str) -> str:
+    """OR together the longer words of a problem for the full-text stage."""
+    return build_tsquery(' '.join(word for word in tokenize(problem) if len(word) > 2), '|')
+
+def candidate_packages(keyword_match: KeywordMatch, search_results: List[str]) -> List[str]:
+    """Keyword matches first (higher priority), then search hits, capped at MAX_SUGGESTIONS."""
+    keyword_packages = set(keyword_match.packages)
+    combined = keyword_match.packages + [pkg for pkg in search_results if pkg not in keyword_packages]
+    return combined[:MAX_SUGGESTIONS]
+
+def build_diagnosis(
+    problem: str,
+    keyword_match: KeywordMatch,
+    top_packages: List[str],
+    packages: Mapping[str, Any],
+    rules: "RulesSnapshot"
+) -> Dict:
+    """Assemble the /api/diagnose response for one problem."""
+    if not top_packages:
+        return {
+            "problem": problem,
+            "suggestions": [],
+            "message": "No specific packages identified. Try searching with different keywords."
+        }
+    
+    keyword_packages = set(keyword_match.packages)
+    matched_keywords = keyword_match.keywords
+    suggestions = []
+    
+    for idx, pkg_name in enumerate(top_packages):
+        if pkg_name not in packages:
+            continue
+        
+        pkg = packages[pkg_name]
+        is_keyword_match = pkg_name in keyword_packages
+        
+        # Determine confidence score
+        confidence = 95 - (idx * 10) if is_keyword_match else 70 - (idx * 5)
+        confidence = max(confidence, 50)
+        
+        # Get reason
+        reason = rules.reasons.get(pkg_name, f"Related to {', '.join(matched_keywords[:2])} functionality" if matched_keywords else pkg.description)
+        
+        # Get suggested action
+        action = rules.actions.get(pkg_name, "Check Arch Wiki for troubleshooting")
+        
+        suggestions.append({
+            "package": summarize(pkg),
+            "confidence": confidence,
+            "reason": reason,
+            "command": action,
+            "match_type": "keyword" if is_keyword_match else "search"
+        })
+    
+    return {
+        "problem": problem,
+        "matched_keywords": matched_keywords,
+        "suggestions": suggestions,
+        "total_found": len(suggestions)
+    }
+
+class RulesSnapshot(NamedTuple):
+    """An immutable, fully compiled rule set. Handlers read one per request."""
+    version: int
+    keyword_index: KeywordIndex
+    reasons: Mapping[str, str]
+    actions: Mapping[str, str]
+    common_errors: Mapping[str, Any]
+    source_mtime: Optional[float]
+    loaded_at: float
+    load_ms: float
+
+def validate_rules(rules: Any) -> Dict[str, Any]:
+    """Check the shape of a parsed rules document, raising ValueError on problems."""
+    if not isinstance(rules, dict):
+        raise ValueError("rules file must contain a JSON object")
+    for section in ('keywords', 'reasons', 'actions', 'common_errors'):
+        if not isinstance(rules.get(section, {}), dict):
+            raise ValueError(f"'{section}' must be an object")
+    for keyword, packages in rules.get('keywords', {}).items():
+        if not isinstance(packages, list) or not all(isinstance(p, str) for p in packages):
+            raise ValueError(f"keyword '{keyword}' must map to a list of package names")
+    for section in ('reasons', 'actions'):
+        for package, value in rules.get(section, {}).items():
+            if not isinstance(value, str):
+                raise ValueError(f"{section}['{package}'] must be a string")
+    return rules
+
+def compile_rules(rules: Dict[str, Any], version: int, source_mtime: Optional[float] = None) -> RulesSnapshot:
+    started = time.perf_counter()
+    keyword_index = KeywordIndex(rules.get('keywords', {}))
+    return RulesSnapshot(
+        version=version,
+        keyword_index=keyword_index,
+        reasons=MappingProxyType(dict(rules.get('reasons', {}))),
+        actions=MappingProxyType(dict(rules.get('actions', {}))),
+        common_errors=MappingProxyType(dict(rules.get('common_errors', {}))),
+        source_mtime=source_mtime,
+        loaded_at=time.time(),
+        load_ms=(time.perf_counter() - started) * 1e3
+    )
+
+class RulesLoader:
+    """
+    Owns the current RulesSnapshot for a rules file.
+
+    Reloads parse, validate and compile a complete new snapshot off the
+    event loop and then replace the reference in one assignment, so a
+    request that grabbed the old snapshot finishes with it untouched. A
+    file that fails to load leaves the previous snapshot in place.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.snapshot = compile_rules({}, version=0)
+        self.last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+    
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+    
+    def _build(self, version: int) -> RulesSnapshot:
+        started = time.perf_counter()
+        mtime = self._mtime()
+        with open(self.path, 'r') as f:
+            rules = validate_rules(json.load(f))
+        snapshot = compile_rules(rules, version, mtime)
+        return snapshot._replace(load_ms=(time.perf_counter() - started) * 1e3)
+    
+    def load(self) -> RulesSnapshot:
+        """Synchronous load used at import time."""
+        try:
+            self.snapshot = self._build(self.snapshot.version + 1)
+            self.last_error = None
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+        return self.snapshot
+    
+    async def reload(self) -> RulesSnapshot:
+        """Rebuild the snapshot in a worker thread and swap it in."""
+        async with self._lock:
+            try:
+                snapshot = await asyncio.to_thread(self._build, self.snapshot.version + 1)
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+                print(f"⚠️  Keeping diagnostic rules v{self.snapshot.version}: {e}")
+                return self.snapshot
+            self.snapshot = snapshot
+            self.last_error = None
+            print(f"✅ Loaded diagnostic rules v{snapshot.version} in {snapshot.load_ms:.1f}ms")
+            return snapshot
+    
+    async def _watch(self, interval: float):
+        seen_mtime = self.snapshot.source_mtime
+        while True:
+            await asyncio.sleep(interval)
+            mtime = self._mtime()
+            # Compare with the last attempt so a broken file is reported once
+            if mtime is not None and mtime != seen_mtime:
+                seen_mtime = mtime
+                await self.reload()
+    
+    def start_watching(self, interval: float):
+        """Poll the file's mtime every `interval` seconds and reload on change."""
+        if self._watcher is None and interval > 0:
+            self._watcher = asyncio.create_task(self._watch(interval))
+    
+    async def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+    
+    def status(self) -> Dict:
+        snapshot = self.snapshot
+        return {
+            "path": self.path,
+            "version": snapshot.version,
+            "keywords": len(snapshot.keyword_index),
+            "reasons": len(snapshot.reasons),
+            "actions": len(snapshot.actions),
+            "loaded_at": snapshot.loaded_at,
+            "load_ms": round(snapshot.load_ms, 3),
+            "watching": self._watcher is not None,
+            "last_error": self.last_error
+        }
@@ -1,21 +1,78 @@
-from fastapi import FastAPI, Depends, Query, HTTPException
+from fastapi import FastAPI, Depends, Header, Query, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text
-from typing import List, Dict, Optional
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.exc import SQLAlchemyError
+from typing import List, Dict, Literal, Optional
 from pydantic import BaseModel
-from database import get_session, init_db
-from models import Package
+from database import get_read_connection, init_db, pool_status, read_connection
+from cache import DatasetVersionMonitor, ResponseCache, ResponseCacheMiddleware, VersionedSnapshot, read_dataset_version
+from category_index import etag_matches, load_categories
+from suggest import load_suggest_index
+from catalog import load_catalog
+from serialization import FastJSONResponse, dumps, summarize_all
+from metrics import HTTPMetrics, MetricsMiddleware, render_prometheus
+from timing import TimingMiddleware, stage
+from cursors import encode_cursor, decode_cursor
+from queries import QUERIES
+from tsquery import build_tsquery, normalize as normalize_query
+from diagnostics import RulesLoader, RulesSnapshot, build_diagnosis, candidate_packages, search_term_for
+import csv
+import io
 import os
 import json
+import secrets
+import zlib
+from functools import partial
 
 app = FastAPI(
     title="ArchLens API",
     description="Backend API for the ArchLens Arch Linux package explorer",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
-# CORS middleware configuration
+async def load_dataset_version() -> int:
+    # Polled where the read endpoints read, so a replica that has not
+    # replayed a seed yet does not announce its version early
+    async with read_connection() as conn:
+        return await read_dataset_version(conn)
+
+# The seeder bumps the dataset version; in-process caches watch it to know
+# when to drop or rebuild their contents
+dataset_version = DatasetVersionMonitor(
+    load_dataset_version,
+    check_interval=float(os.getenv("DATASET_VERSION_CHECK", "5"))
+)
+
+# Snapshot serving mode: category pages, counts and diagnose lookups come
+# from an in-memory column store instead of the database
+catalog_service = (
+    VersionedSnapshot(partial(load_catalog, read_connection), dataset_version)
+    if os.getenv("CATALOG_SNAPSHOT", "false").lower() == "true" else None
+)
+category_index = VersionedSnapshot(
+    partial(load_categories, read_connection, catalog=catalog_service), dataset_version
+)
+suggest_service = VersionedSnapshot(partial(load_suggest_index, read_connection), dataset_version)
+
+# Response cache for the paginated read endpoints (/api/categories is
+# served from category_index instead)
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+    version_monitor=dataset_version
+)
+if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true":
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        cache=response_cache,
+        prefixes=("/api/packages/", "/api/search")
+    )
+
+# CORS middleware configuration. Middleware added later wraps what came
+# before, so the order from the inside out is: response cache, CORS,
+# timing, metrics. CORS therefore also wraps cached responses.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,19 +81,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load diagnostic rules
-DIAGNOSTIC_RULES = {}
-try:
-    with open('diagnostic_rules.json', 'r') as f:
-        DIAGNOSTIC_RULES = json.load(f)
-except FileNotFoundError:
-    print("⚠️  Warning: diagnostic_rules.json not found. Diagnostic features will be limited.")
+# Server-Timing header and sampled slow-request log; outside the response
+# cache so cached entries never carry a stale header
+if os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true":
+    app.add_middleware(TimingMiddleware)
+
+# Per-route request metrics, served at /metrics. Outermost, so cache hits
+# and CORS preflights are counted; when disabled nothing is installed
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+http_metrics = HTTPMetrics()
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, metrics=http_metrics)
+
+# Load diagnostic rules; edits are picked up by the watcher or the admin
+# reload endpoint without a restart
+rules_loader = RulesLoader(os.getenv("DIAGNOSTIC_RULES_PATH", "diagnostic_rules.json"))
+rules_loader.load()
+if rules_loader.last_error:
+    print(f"⚠️  Warning: could not load diagnostic rules ({rules_loader.last_error}). Diagnostic features will be limited.")
 
 @app.on_event("startup")
 async def startup():
     """Initialize database on startup."""
     await init_db()
     print("✅ Database initialized")
+    await dataset_version.refresh()
+    dataset_version.start_watching()
+    if catalog_service is not None:
+        catalog = await catalog_service.reload()
+        print(f"✅ Loaded catalog snapshot: {len(catalog)} packages, ~{catalog.memory_bytes() // 1024} KiB")
+    snapshot = await category_index.reload()
+    print(f"✅ Loaded {len(snapshot.categories)} categories")
+    suggest_index = await suggest_service.reload()
+    print(f"✅ Built autocomplete index over {len(suggest_index.names)} packages")
+    rules_loader.start_watching(float(os.getenv("DIAGNOSTIC_RULES_WATCH_INTERVAL", "2")))
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background tasks."""
+    await rules_loader.stop_watching()
+    await dataset_version.stop_watching()
 
 @app.get("/")
 async def root():
@@ -48,46 +132,80 @@ async def root():
             "categories": "/api/categories",
             "packages": "/api/packages/{category_name}",
             "search": "/api/search?q=term",
-            "diagnose": "/api/diagnose (POST)"
+            "suggest": "/api/suggest?prefix=term",
+            "export": "/api/export?format=ndjson|csv",
+            "diagnose": "/api/diagnose (POST)",
+            "diagnose_batch": "/api/diagnose/batch (POST)"
         }
     }
 
-@app.get("/api/categories")
-async def get_categories(
-    session: AsyncSession = Depends(get_session)
-) -> List[Dict]:
+@app.get("/api/categories", response_class=Response)
+async def get_categories(request: Request) -> Response:
     """Get all package categories with their package counts."""
-    query = select(
-        Package.category,
-        func.count(Package.id).label('count')
-    ).group_by(Package.category).order_by(Package.category)
+    snapshot = await category_index.current()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
     
-    result = await session.execute(query)
-    categories = result.all()
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
     
-    return [
-        {
-            "name": cat.category,
-            "count": cat.count
-        }
-        for cat in categories
-    ]
+    return Response(
+        content=snapshot.body,
+        media_type="application/json",
+        headers=headers
+    )
+
+def parse_cursor(after: Optional[str], before: Optional[str], size: int) -> Optional[List]:
+    """Decode whichever keyset cursor was supplied, rejecting bad tokens with a 400."""
+    if after and before:
+        raise HTTPException(status_code=400, detail="Use either 'after' or 'before', not both")
+    token = after or before
+    if not token:
+        return None
+    try:
+        return decode_cursor(token, size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/packages/{category_name}")
 async def get_packages_by_category(
     category_name: str,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(30, ge=1, le=100, description="Items per page"),
-    session: AsyncSession = Depends(get_session)
+    after: Optional[str] = Query(None, description="Cursor from pagination.next_cursor"),
+    before: Optional[str] = Query(None, description="Cursor from pagination.prev_cursor")
 ):
     """Get paginated packages for a specific category."""
-    offset = (page - 1) * page_size
+    cursor = parse_cursor(after, before, 1)
+    offset = (page - 1) * page_size if cursor is None else 0
+    direction = "before" if before else "after" if after else None
     
-    count_query = select(func.count(Package.id)).where(
-        Package.category == category_name
-    )
-    total_result = await session.execute(count_query)
-    total = total_result.scalar()
+    if catalog_service is not None:
+        catalog = await catalog_service.current()
+        with stage("catalog"):
+            total = catalog.category_count(category_name)
+            packages = catalog.category_page(
+                category_name,
+                page_size + 1,
+                offset=offset,
+                after=cursor[0] if after else None,
+                before=cursor[0] if before else None
+            )
+    else:
+        async with read_connection() as conn:
+            total_result = await QUERIES.execute(conn, "category_count", {"category": category_name})
+            total = total_result.scalar()
+            
+            # Keyset pages seek on the (category, name) index instead of skipping rows
+            params = {"category": category_name, "limit": page_size + 1}
+            if cursor is not None:
+                params["cursor_name"] = cursor[0]
+            else:
+                params["offset"] = offset
+            
+            packages = []
+            if total:
+                result = await QUERIES.execute(conn, "category_page", params, variant=direction)
+                packages = result.all()
     
     if total == 0:
         raise HTTPException(
@@ -95,108 +213,376 @@ async def get_packages_by_category(
             detail=f"Category '{category_name}' not found or contains no packages"
         )
     
-    query = select(Package).where(
-        Package.category == category_name
-    ).order_by(Package.name).offset(offset).limit(page_size)
+    has_more = len(packages) > page_size
+    packages = packages[:page_size]
+    if before:
+        packages.reverse()
+    has_next = True if before else has_more
+    has_previous = has_more if before else bool(after) or page > 1
     
-    result = await session.execute(query)
-    packages = result.scalars().all()
-    
-    return {
-        "packages": [
-            {
-                "id": pkg.id,
-                "name": pkg.name,
-                "category": pkg.category,
-                "description": pkg.description
-            }
-            for pkg in packages
-        ],
+    return FastJSONResponse({
+        "packages": summarize_all(packages),
         "pagination": {
             "page": page,
             "page_size": page_size,
             "total": total,
             "total_pages": (total + page_size - 1) // page_size,
-            "has_next": page * page_size < total,
-            "has_previous": page > 1
+            "has_next": has_next,
+            "has_previous": has_previous,
+            "next_cursor": encode_cursor(packages[-1].name) if has_next and packages else None,
+            "prev_cursor": encode_cursor(packages[0].name) if has_previous and packages else None
         }
-    }
+    })
+
+async def estimate_search_total(conn: AsyncConnection, mode: str, search_term: str) -> int:
+    """Read the planner's row estimate for a search without executing it."""
+    result = await QUERIES.execute(conn, "search_estimate", {"search_term": search_term}, variant=mode)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def search_term_for_mode(mode: str, q: str) -> str:
+    if mode == "fuzzy":
+        return normalize_query(q)
+    return build_tsquery(q)
+
+def search_response(
+    q: str,
+    mode: str,
+    packages: List,
+    page: int,
+    page_size: int,
+    total: Optional[int],
+    has_next: bool,
+    has_previous: bool,
+    estimated: bool = False
+) -> FastJSONResponse:
+    return FastJSONResponse({
+        "query": q,
+        "mode": mode,
+        "packages": summarize_all(packages),
+        "pagination": {
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "total_estimated": estimated,
+            "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+            "has_next": has_next,
+            "has_previous": has_previous,
+            "next_cursor": encode_cursor(mode, packages[-1].rank, packages[-1].name) if has_next and packages else None,
+            "prev_cursor": encode_cursor(mode, packages[0].rank, packages[0].name) if has_previous and packages else None
+        }
+    })
 
 @app.get("/api/search")
 async def search_packages(
     q: str = Query(..., min_length=1, description="Search query"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(30, ge=1, le=100, description="Items per page"),
-    session: AsyncSession = Depends(get_session)
+    mode: Literal["fts", "fuzzy"] = Query(
+        "fts",
+        description="fts: full-text search, retried as fuzzy when it finds nothing; fuzzy: typo-tolerant name match"
+    ),
+    count: Literal["exact", "estimate", "none"] = Query(
+        "exact",
+        description="How to compute the total: exact window count, planner estimate, or skip it"
+    ),
+    after: Optional[str] = Query(None, description="Cursor from pagination.next_cursor"),
+    before: Optional[str] = Query(None, description="Cursor from pagination.prev_cursor"),
+    conn: AsyncConnection = Depends(get_read_connection)
 ):
     """Full-text search across package names and descriptions."""
-    offset = (page - 1) * page_size
-    search_term = ' & '.join(word for word in q.split() if word)
+    cursor = parse_cursor(after, before, 3)
+    offset = (page - 1) * page_size if cursor is None else 0
+    
+    # Cursors carry the mode that ranked them so follow-up pages stay consistent
+    direction = None
+    cursor_params = {}
+    if cursor is not None:
+        cursor_mode, cursor_rank, cursor_name = cursor
+        if (
+            cursor_mode not in ("fts", "fuzzy")
+            or not isinstance(cursor_rank, (int, float))
+            or not isinstance(cursor_name, str)
+        ):
+            raise HTTPException(status_code=400, detail="Malformed pagination cursor")
+        mode = cursor_mode
+        cursor_params = {"cursor_rank": cursor_rank, "cursor_name": cursor_name}
+        direction = "before" if before else "after"
     
-    search_query = text("""
-        SELECT id, name, category, description,
-               ts_rank(search_vector, query) as rank
-        FROM packages,
-             to_tsquery('english', :search_term) query
-        WHERE search_vector @@ query
-        ORDER BY rank DESC, name
-        OFFSET :offset LIMIT :limit
-    """)
+    async def run_page(page_mode: str):
+        search_term = search_term_for_mode(page_mode, q)
+        if not search_term:
+            # Nothing searchable left after compiling the input
+            return search_term, []
+        params = {"search_term": search_term, "offset": offset, "limit": page_size + 1, **cursor_params}
+        # One extra row is fetched to learn whether more pages exist
+        result = await QUERIES.execute(
+            conn, "search_page", params, variant=(page_mode, count == "exact", direction)
+        )
+        return search_term, result.all()
     
-    count_query = text("""
-        SELECT COUNT(*)
-        FROM packages,
-             to_tsquery('english', :search_term) query
-        WHERE search_vector @@ query
-    """)
+    # A query that is exactly a package name lists that package and its
+    # name-prefix siblings without ranking, when they fit on one page
+    if mode == "fts" and cursor is None and offset == 0:
+        suggest_index = await suggest_service.current()
+        # The SQL compares case-sensitively, so bind the name as stored
+        name = suggest_index.find(normalize_query(q))
+        if name is not None:
+            escaped = name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            with stage("name"):
+                result = await QUERIES.execute(
+                    conn, "search_name_prefix",
+                    {"name": name, "prefix": escaped + '%', "limit": page_size + 1}
+                )
+                packages = result.all()
+            if packages and len(packages) <= page_size:
+                return search_response(
+                    q, "name", packages, page, page_size,
+                    total=len(packages), has_next=False, has_previous=False
+                )
     
     try:
-        count_result = await session.execute(
-            count_query,
-            {"search_term": search_term}
-        )
-        total = count_result.scalar() or 0
+        with stage("search"):
+            search_term, packages = await run_page(mode)
         
-        result = await session.execute(
-            search_query,
-            {"search_term": search_term, "offset": offset, "limit": page_size}
-        )
-        packages = result.all()
+        # A typo usually means zero full-text hits; answer with the trigram
+        # ranking instead of making the client retry variants
+        if not packages and mode == "fts" and cursor is None and offset == 0:
+            mode = "fuzzy"
+            with stage("fuzzy"):
+                search_term, packages = await run_page(mode)
         
-        return {
-            "query": q,
-            "packages": [
-                {
-                    "id": pkg.id,
-                    "name": pkg.name,
-                    "category": pkg.category,
-                    "description": pkg.description
-                }
-                for pkg in packages
-            ],
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total": total,
-                "total_pages": (total + page_size - 1) // page_size if total > 0 else 0,
-                "has_next": page * page_size < total,
-                "has_previous": page > 1
-            }
-        }
+        has_more = len(packages) > page_size
+        packages = packages[:page_size]
+        if before:
+            packages.reverse()
+        has_next = True if before else has_more
+        has_previous = has_more if before else bool(after) or page > 1
+        
+        async def exact_count() -> int:
+            count_result = await QUERIES.execute(
+                conn, "search_count", {"search_term": search_term}, variant=mode
+            )
+            return count_result.scalar() or 0
+        
+        estimated = False
+        if count == "exact":
+            if packages:
+                total = packages[0].total
+            elif offset > 0 or cursor is not None:
+                # Past the last page the window has no rows to report on
+                total = await exact_count()
+            else:
+                total = 0
+        elif cursor is None and not has_next and (packages or offset == 0):
+            total = offset + len(packages)
+        elif count == "estimate":
+            if packages and has_next:
+                # The rows already seen are a hard lower bound on the estimate
+                total = max(await estimate_search_total(conn, mode, search_term), offset + len(packages))
+                estimated = True
+            else:
+                # An empty page past the end, or the last page reached by
+                # cursor: nothing further to estimate, so count exactly
+                total = await exact_count()
+        else:
+            total = None
+        
+        return search_response(
+            q, mode, packages, page, page_size,
+            total=total, has_next=has_next, has_previous=has_previous, estimated=estimated
+        )
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid search query: {str(e)}"
         )
 
-# Pydantic model for diagnostic request
+@app.get("/api/suggest")
+async def suggest_packages(
+    prefix: str = Query(..., min_length=1, description="Package name prefix"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum suggestions")
+):
+    """Prefix autocomplete over package names, served from memory."""
+    index = await suggest_service.current()
+    return FastJSONResponse({
+        "prefix": prefix,
+        "suggestions": index.lookup(prefix.strip(), limit)
+    })
+
+EXPORT_COLUMNS = ["id", "name", "category", "description"]
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+def encode_export_rows(rows, export_format: str) -> str:
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n"
+        for row in rows
+    )
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip.
+
+    Honours q-values: "gzip;q=0" refuses it, and a wildcard only counts
+    when gzip itself is not listed.
+    """
+    wildcard = None
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding in ("gzip", "x-gzip"):
+            return quality > 0
+        if coding == "*":
+            wildcard = quality > 0
+    return bool(wildcard)
+
+@app.get("/api/export")
+async def export_packages(
+    request: Request,
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Output format"),
+    category: Optional[str] = Query(None, description="Only export this category")
+):
+    """
+    Stream the whole catalog (or one category) as NDJSON or CSV.
+
+    Rows are read through a server-side cursor in batches of
+    EXPORT_BATCH_SIZE and written out as they arrive, so memory use does
+    not grow with the catalog. Compressed with gzip when the client
+    accepts it.
+    """
+    use_gzip = accepts_gzip(request.headers.get("accept-encoding", ""))
+    
+    async def generate_chunks():
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if use_gzip else None
+        
+        def emit(chunk: str) -> bytes:
+            data = chunk.encode('utf-8')
+            return compressor.compress(data) if compressor else data
+        
+        if export_format == "csv":
+            yield emit(encode_export_rows([EXPORT_COLUMNS], export_format))
+        
+        async with read_connection() as conn:
+            result = await conn.stream(
+                QUERIES.get("export_packages", "category" if category else None),
+                {"category": category} if category else {},
+                execution_options={"yield_per": EXPORT_BATCH_SIZE}
+            )
+            async for rows in result.partitions():
+                chunk = emit(encode_export_rows(rows, export_format))
+                if chunk:
+                    yield chunk
+        
+        if compressor:
+            yield compressor.flush()
+    
+    extension = "csv" if export_format == "csv" else "ndjson"
+    headers = {
+        "Content-Disposition": f'attachment; filename="archlens-packages.{extension}"',
+        "Vary": "Accept-Encoding"
+    }
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        generate_chunks(),
+        media_type="text/csv" if export_format == "csv" else "application/x-ndjson",
+        headers=headers
+    )
+
+# Pydantic models for diagnostic requests
 class DiagnosticRequest(BaseModel):
     problem: str
 
+class DiagnosticBatchRequest(BaseModel):
+    problems: List[str]
+
+BATCH_MAX_PROBLEMS = int(os.getenv("DIAGNOSE_BATCH_MAX_PROBLEMS", "10000"))
+BATCH_CHUNK_SIZE = int(os.getenv("DIAGNOSE_BATCH_CHUNK_SIZE", "1000"))
+
+async def diagnose_many(conn: AsyncConnection, problems: List[str], rules: RulesSnapshot) -> List[Dict]:
+    """
+    Run both diagnose stages for a list of problems, returning results in input order.
+
+    Keyword matching happens in Python; the full-text stage for every
+    problem is a single unnest + LATERAL statement and all candidate
+    packages are fetched with one name = ANY(...) lookup, so the database
+    sees two statements regardless of the number of problems.
+    """
+    normalized = [problem.lower().strip() for problem in problems]
+    with stage("keywords"):
+        keyword_results = [rules.keyword_index.match(problem) for problem in normalized]
+    
+    # Stage 2: Full-text search (broader search), one row per (problem, hit)
+    search_results: Dict[int, List[str]] = {}
+    ordinals, terms = [], []
+    for ordinal, problem in enumerate(normalized):
+        search_term = search_term_for(problem)
+        if search_term:
+            ordinals.append(ordinal)
+            terms.append(search_term)
+    
+    if terms:
+        try:
+            with stage("fts"):
+                async with conn.begin_nested():
+                    result = await QUERIES.execute(
+                        conn, "diagnose_fts", {"ordinals": ordinals, "terms": terms}
+                    )
+                    for ordinal, name in result:
+                        search_results.setdefault(ordinal, []).append(name)
+        except SQLAlchemyError:
+            # Keyword matches still stand on their own
+            search_results = {}
+    
+    top_packages = [
+        candidate_packages(keyword_match, search_results.get(ordinal, []))
+        for ordinal, keyword_match in enumerate(keyword_results)
+    ]
+    
+    # Fetch package details for every problem at once
+    wanted = {name for names in top_packages for name in names}
+    packages = {}
+    with stage("fetch"):
+        if wanted and catalog_service is not None:
+            catalog = await catalog_service.current()
+            packages = catalog.lookup(wanted)
+        elif wanted:
+            result = await QUERIES.execute(conn, "diagnose_packages", {"names": list(wanted)})
+            packages = {pkg.name: pkg for pkg in result}
+    
+    with stage("build"):
+        return [
+            build_diagnosis(problem, keyword_match, names, packages, rules)
+            if normalized_problem else {
+                "problem": problem,
+                "suggestions": [],
+                "message": "Problem description cannot be empty"
+            }
+            for problem, normalized_problem, keyword_match, names
+            in zip(problems, normalized, keyword_results, top_packages)
+        ]
+
 @app.post("/api/diagnose")
 async def diagnose_problem(
     request: DiagnosticRequest,
-    session: AsyncSession = Depends(get_session)
+    conn: AsyncConnection = Depends(get_read_connection)
 ):
     """
     Diagnose system problems by matching user descriptions to relevant packages.
@@ -205,102 +591,104 @@ async def diagnose_problem(
     1. Keyword matching against diagnostic_rules.json for high-confidence matches
     2. Full-text search against the database for additional relevant packages
     """
-    problem = request.problem.lower().strip()
-    
-    if not problem:
+    if not request.problem.strip():
         raise HTTPException(status_code=400, detail="Problem description cannot be empty")
     
-    # Stage 1: Keyword matching (high confidence)
-    keyword_matches = set()
-    matched_keywords = []
-    
-    if DIAGNOSTIC_RULES and 'keywords' in DIAGNOSTIC_RULES:
-        for keyword, packages in DIAGNOSTIC_RULES['keywords'].items():
-            if keyword in problem:
-                keyword_matches.update(packages)
-                matched_keywords.append(keyword)
-    
-    # Stage 2: Full-text search (broader search)
-    search_results = set()
-    search_term = ' | '.join(word for word in problem.split() if len(word) > 2)
-    
-    if search_term:
-        try:
-            search_query = text("""
-                SELECT DISTINCT name
-                FROM packages,
-                     to_tsquery('english', :search_term) query
-                WHERE search_vector @@ query
-                LIMIT 10
-            """)
-            
-            result = await session.execute(
-                search_query,
-                {"search_term": search_term}
-            )
-            search_results = {row[0] for row in result}
-        except:
-            pass
-    
-    # Combine results - keyword matches first (higher priority)
-    combined_packages = list(keyword_matches) + [pkg for pkg in search_results if pkg not in keyword_matches]
-    
-    # Limit to top 5 packages
-    top_packages = combined_packages[:5]
+    # One snapshot for the whole request, even if a reload lands mid-way
+    rules = rules_loader.snapshot
+    results = await diagnose_many(conn, [request.problem], rules)
+    return FastJSONResponse(results[0])
+
+@app.post("/api/diagnose/batch")
+async def diagnose_batch(
+    request: DiagnosticBatchRequest,
+    stream: bool = Query(False, description="Stream results as NDJSON lines")
+):
+    """
+    Diagnose many problem reports in one call.
+
+    Results keep the input order. Batches larger than one chunk, or any
+    batch with ?stream=true, are streamed as NDJSON (one result per line,
+    each tagged with its input index) so the response is never held in
+    memory as a whole.
+
+    The connection is opened here rather than injected: a streamed
+    response outlives the handler, so it holds its own connection for as
+    long as the stream runs and nothing is checked out beforehand.
+    """
+    problems = request.problems
+    if len(problems) > BATCH_MAX_PROBLEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(problems)} problems (max {BATCH_MAX_PROBLEMS})"
+        )
     
-    if not top_packages:
-        return {
-            "problem": request.problem,
-            "suggestions": [],
-            "message": "No specific packages identified. Try searching with different keywords."
-        }
+    rules = rules_loader.snapshot
     
-    # Fetch package details
-    query = select(Package).where(Package.name.in_(top_packages))
-    result = await session.execute(query)
-    packages = {pkg.name: pkg for pkg in result.scalars().all()}
+    if not stream and len(problems) <= BATCH_CHUNK_SIZE:
+        async with read_connection() as conn:
+            results = await diagnose_many(conn, problems, rules)
+        return FastJSONResponse({"results": results, "total": len(results)})
     
-    # Build response with reasons and actions
-    suggestions = []
-    reasons_map = DIAGNOSTIC_RULES.get('reasons', {}) if DIAGNOSTIC_RULES else {}
-    actions_map = DIAGNOSTIC_RULES.get('actions', {}) if DIAGNOSTIC_RULES else {}
+    async def generate_lines():
+        async with read_connection() as conn:
+            for start in range(0, len(problems), BATCH_CHUNK_SIZE):
+                chunk = problems[start:start + BATCH_CHUNK_SIZE]
+                results = await diagnose_many(conn, chunk, rules)
+                yield b"".join(
+                    dumps({"index": index, **result}) + b"\n"
+                    for index, result in enumerate(results, start=start)
+                )
     
-    for idx, pkg_name in enumerate(top_packages):
-        if pkg_name not in packages:
-            continue
-            
-        pkg = packages[pkg_name]
-        is_keyword_match = pkg_name in keyword_matches
-        
-        # Determine confidence score
-        confidence = 95 - (idx * 10) if is_keyword_match else 70 - (idx * 5)
-        confidence = max(confidence, 50)
-        
-        # Get reason
-        reason = reasons_map.get(pkg_name, f"Related to {', '.join(matched_keywords[:2])} functionality" if matched_keywords else pkg.description)
-        
-        # Get suggested action
-        action = actions_map.get(pkg_name, "Check Arch Wiki for troubleshooting")
-        
-        suggestions.append({
-            "package": {
-                "id": pkg.id,
-                "name": pkg.name,
-                "category": pkg.category,
-                "description": pkg.description
-            },
-            "confidence": confidence,
-            "reason": reason,
-            "command": action,
-            "match_type": "keyword" if is_keyword_match else "search"
-        })
-    
-    return {
-        "problem": request.problem,
-        "matched_keywords": matched_keywords,
-        "suggestions": suggestions,
-        "total_found": len(suggestions)
-    }
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Response cache hit/miss counters."""
+    return response_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=METRICS_ENABLED)
+async def get_metrics():
+    """Request and query metrics in Prometheus text format."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(
+        render_prometheus(http_metrics, QUERIES.histograms),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get("/metrics/pool")
+async def get_pool_metrics():
+    """Connection pool occupancy, checkout counts and wait times."""
+    return pool_status()
+
+@app.get("/metrics/queries")
+async def get_query_metrics():
+    """Latency histograms for each registered hot statement."""
+    return QUERIES.stats()
+
+@app.get("/api/admin/rules")
+async def get_rules_status():
+    """Version and load time of the active diagnostic rules snapshot."""
+    return rules_loader.status()
+
+# Shared secret for the mutating admin endpoints; unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Reject admin calls without the X-Admin-Token header matching ADMIN_TOKEN."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/api/admin/rules/reload", dependencies=[Depends(require_admin_token)])
+async def reload_rules():
+    """Re-read diagnostic_rules.json and swap in the new snapshot (needs X-Admin-Token)."""
+    await rules_loader.reload()
+    if rules_loader.last_error:
+        raise HTTPException(status_code=422, detail=f"Rules not reloaded: {rules_loader.last_error}")
+    return rules_loader.status()
 
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,212 @@
+"""
+Per-route HTTP metrics in Prometheus text format.
+
+MetricsMiddleware records, for every request, the route template it was
+served by (e.g. /api/packages/{category_name}, so labels stay bounded),
+its latency and response size, plus a gauge of requests in flight. All
+counters are plain integers mutated from the event loop thread only, so
+recording needs no locks. render_prometheus() turns them, together with
+the per-statement query histograms, into the /metrics exposition. The
+query histograms (queries.QUERIES) use the same Histogram type.
+
+The middleware is only installed when METRICS_ENABLED is true; with it
+off the request path does no metrics work at all.
+"""
+import bisect
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.routing import Match
+
+# Upper bounds; the last bucket is +Inf
+DURATION_BUCKETS_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+SIZE_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+UNMATCHED_ROUTE = "unmatched"
+
+class Histogram:
+    """
+    Fixed-bucket histogram (cumulative counts are derived on read).
+
+    Only touched from the event loop, so unlocked.
+    """
+    
+    __slots__ = ("bounds", "counts", "count", "total")
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-th observation."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+class RouteMetrics:
+    __slots__ = ("responses", "duration", "size")
+    
+    def __init__(self):
+        # (method, status) -> count
+        self.responses: Dict[Tuple[str, int], int] = {}
+        self.duration = Histogram(DURATION_BUCKETS_SECONDS)
+        self.size = Histogram(SIZE_BUCKETS_BYTES)
+
+class HTTPMetrics:
+    """All per-route series plus the in-flight gauge."""
+    
+    def __init__(self):
+        self.routes: Dict[str, RouteMetrics] = {}
+        self.in_flight = 0
+    
+    def observe(self, route: str, method: str, status: int, seconds: float, size: int):
+        metrics = self.routes.get(route)
+        if metrics is None:
+            metrics = self.routes[route] = RouteMetrics()
+        key = (method, status)
+        metrics.responses[key] = metrics.responses.get(key, 0) + 1
+        metrics.duration.observe(seconds)
+        metrics.size.observe(size)
+
+class MetricsMiddleware:
+    """ASGI middleware feeding HTTPMetrics; install it outermost so it sees cache hits too."""
+    
+    def __init__(self, app, metrics: HTTPMetrics):
+        self.app = app
+        self.metrics = metrics
+        self._paths_by_endpoint: Optional[Dict] = None
+    
+    def route_for(self, scope) -> str:
+        """Route template for a finished request."""
+        router = scope["app"].router
+        if self._paths_by_endpoint is None:
+            self._paths_by_endpoint = {
+                route.endpoint: route.path
+                for route in router.routes if hasattr(route, "endpoint")
+            }
+        # The router stores the matched endpoint in the scope; responses
+        # that never reached it (cache hits, 404s) are matched here instead
+        path = self._paths_by_endpoint.get(scope.get("endpoint"))
+        if path is not None:
+            return path
+        for route in router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return UNMATCHED_ROUTE
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+    
+        metrics = self.metrics
+        status = 500
+        size = 0
+    
+        async def instrumented_send(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+    
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, instrumented_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            metrics.observe(self.route_for(scope), scope["method"], status, elapsed, size)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs)
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound)) if bound != float("inf") else "+Inf"
+
+def _histogram_lines(
+    name: str,
+    labels: List[Tuple[str, str]],
+    bounds: Tuple[float, ...],
+    counts: List[int],
+    count: int,
+    total: float
+) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(bounds + (float("inf"),), counts):
+        cumulative += bucket_count
+        lines.append(f"{name}_bucket{{{_labels(labels + [('le', _format_bound(bound))])}}} {cumulative}")
+    lines.append(f"{name}_sum{{{_labels(labels)}}} {total}")
+    lines.append(f"{name}_count{{{_labels(labels)}}} {count}")
+    return lines
+
+def render_prometheus(metrics: HTTPMetrics, query_histograms: Dict[str, Histogram]) -> str:
+    """Prometheus text exposition (format 0.0.4) of the HTTP and query metrics."""
+    routes = sorted(metrics.routes.items())
+    lines = [
+        "# HELP archlens_http_requests_total Completed HTTP requests.",
+        "# TYPE archlens_http_requests_total counter",
+    ]
+    for route, route_metrics in routes:
+        for (method, status), count in sorted(route_metrics.responses.items()):
+            labels = _labels([("route", route), ("method", method), ("status", str(status))])
+            lines.append(f"archlens_http_requests_total{{{labels}}} {count}")
+    
+    lines += [
+        "# HELP archlens_http_requests_in_flight HTTP requests currently being served.",
+        "# TYPE archlens_http_requests_in_flight gauge",
+        f"archlens_http_requests_in_flight {metrics.in_flight}",
+        "# HELP archlens_http_request_duration_seconds HTTP request latency.",
+        "# TYPE archlens_http_request_duration_seconds histogram",
+    ]
+    for route, route_metrics in routes:
+        duration = route_metrics.duration
+        lines += _histogram_lines(
+            "archlens_http_request_duration_seconds", [("route", route)],
+            duration.bounds, duration.counts, duration.count, duration.total
+        )
+    
+    lines += [
+        "# HELP archlens_http_response_size_bytes HTTP response body size.",
+        "# TYPE archlens_http_response_size_bytes histogram",
+    ]
+    for route, route_metrics in routes:
+        size = route_metrics.size
+        lines += _histogram_lines(
+            "archlens_http_response_size_bytes", [("route", route)],
+            size.bounds, size.counts, size.count, size.total
+        )
+    
+    lines += [
+        "# HELP archlens_db_query_duration_seconds Latency of the registered SQL statements.",
+        "# TYPE archlens_db_query_duration_seconds histogram",
+    ]
+    for name, histogram in sorted(query_histograms.items()):
+        # Query histograms are kept in milliseconds
+        lines += _histogram_lines(
+            "archlens_db_query_duration_seconds", [("query", name)],
+            tuple(bound / 1e3 for bound in histogram.bounds),
+            histogram.counts, histogram.count, histogram.total / 1e3
+        )
+    
+    return "\n".join(lines) + "\n"
@@ -1,16 +1,120 @@
-from sqlalchemy import Column, Integer, String, Text, Index
+from sqlalchemy import BigInteger, Column, Computed, ForeignKey, Integer, SmallInteger, String, Text, Index, text
 from sqlalchemy.dialects.postgresql import TSVECTOR
-from database import Base
+from database import Base, schema_upgrade
+
+# Name tokens weigh A and description tokens B, so ts_rank puts name hits
+# first. Postgres keeps the stored column current on every insert/update.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+# Package and category names sort by code point (COLLATE "C") rather than
+# the database locale. That is the order the in-memory catalog snapshot
+# uses, so category pages and their cursors are identical in both serving
+# modes, and the order no longer depends on the server's locale.
+NAME_COLLATION = "C"
+
+class Category(Base):
+    """Category names, stored once; packages reference them by a 2-byte id."""
+    __tablename__ = "categories"
+    
+    id = Column(SmallInteger, primary_key=True)
+    name = Column(String(100, collation=NAME_COLLATION), unique=True, nullable=False)
 
 class Package(Base):
     __tablename__ = "packages"
     
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), unique=True, nullable=False, index=True)
-    category = Column(String(100), nullable=False, index=True)
+    name = Column(String(255, collation=NAME_COLLATION), unique=True, nullable=False, index=True)
+    category_id = Column(SmallInteger, ForeignKey("categories.id"), nullable=False)
     description = Column(Text, nullable=False)
-    search_vector = Column(TSVECTOR)
+    search_vector = Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True))
     
     __table_args__ = (
         Index('idx_search_vector', 'search_vector', postgresql_using='gin'),
-    )
\ No newline at end of file
+        # Category counts are index-only scans; pages read it in name order
+        Index('idx_packages_category_id_name', 'category_id', 'name'),
+        Index(
+            'idx_packages_name_trgm', 'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'}
+        ),
+    )
+
+class DatasetVersion(Base):
+    """Single-row counter bumped by seed.py whenever the package data changes."""
+    __tablename__ = "dataset_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+@schema_upgrade
+async def generate_search_vector(conn):
+    """Older databases have search_vector as a plain column filled by the seeder."""
+    result = await conn.execute(text("""
+        SELECT attgenerated FROM pg_attribute
+        WHERE attrelid = 'packages'::regclass AND attname = 'search_vector'
+    """))
+    if result.scalar() == 's':
+        return
+    # Dropping the column drops idx_search_vector; init_db recreates it
+    await conn.execute(text("ALTER TABLE packages DROP COLUMN IF EXISTS search_vector"))
+    await conn.execute(text(
+        f"ALTER TABLE packages ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+    ))
+
+@schema_upgrade
+async def normalize_categories(conn):
+    """Older databases store the category name as text on every package row."""
+    result = await conn.execute(text("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'packages' AND column_name = 'category'
+    """))
+    if result.scalar() is None:
+        return
+    await conn.execute(text("""
+        INSERT INTO categories (name)
+        SELECT DISTINCT category FROM packages ORDER BY category
+        ON CONFLICT (name) DO NOTHING
+    """))
+    await conn.execute(text("ALTER TABLE packages ADD COLUMN IF NOT EXISTS category_id smallint"))
+    await conn.execute(text("""
+        UPDATE packages p SET category_id = c.id
+        FROM categories c
+        WHERE c.name = p.category
+    """))
+    await conn.execute(text("""
+        ALTER TABLE packages
+            ALTER COLUMN category_id SET NOT NULL,
+            ADD FOREIGN KEY (category_id) REFERENCES categories (id)
+    """))
+    # Takes the old text indexes with it; init_db then creates
+    # idx_packages_category_id_name
+    await conn.execute(text("ALTER TABLE packages DROP COLUMN category"))
+
+@schema_upgrade
+async def collate_names(conn):
+    """Older databases sort package and category names by the database locale."""
+    for table, length in (("categories", 100), ("packages", 255)):
+        result = await conn.execute(text("""
+            SELECT collation_name FROM information_schema.columns
+            WHERE table_name = :table AND column_name = 'name'
+        """), {"table": table})
+        if result.scalar() == NAME_COLLATION:
+            continue
+        if table == "packages":
+            # A column used by a generated column cannot change type, so
+            # search_vector is dropped and re-added around it; init_db then
+            # recreates idx_search_vector
+            await conn.execute(text("ALTER TABLE packages DROP COLUMN IF EXISTS search_vector"))
+        # Rebuilds the indexes on name in the new order
+        await conn.execute(text(
+            f'ALTER TABLE {table} ALTER COLUMN name TYPE varchar({length}) COLLATE "{NAME_COLLATION}"'
+        ))
+        if table == "packages":
+            await conn.execute(text(
+                f"ALTER TABLE packages ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+            ))
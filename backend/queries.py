@@ -0,0 +1,220 @@
+"""
+Registry of the hot SQL statements issued by the API handlers.
+
+Every statement is built once at import with fixed SQL text and only bind
+parameters varying per request. With fixed text, the asyncpg driver's
+per-connection prepared statement cache (sized by DB_STATEMENT_CACHE_SIZE)
+prepares each statement once per pooled connection and reuses it, instead
+of Postgres parsing and planning fresh SQL on every request. Each
+statement also gets its own latency histogram.
+"""
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+from metrics import Histogram
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+def latency_summary(histogram: Histogram) -> Dict:
+    """JSON view of a millisecond Histogram for /metrics/queries."""
+    return {
+        "count": histogram.count,
+        "sum_ms": round(histogram.total, 3),
+        "avg_ms": round(histogram.total / histogram.count, 3) if histogram.count else None,
+        "p50_ms": histogram.quantile(0.50),
+        "p95_ms": histogram.quantile(0.95),
+        "p99_ms": histogram.quantile(0.99),
+        "buckets": {
+            str(bound): bucket_count
+            for bound, bucket_count in zip(histogram.bounds + ("+Inf",), histogram.counts)
+        }
+    }
+
+class QueryRegistry:
+    """Named statements, optionally with variants that share one histogram."""
+    
+    def __init__(self):
+        self._statements: Dict[Tuple[str, Hashable], TextClause] = {}
+        self.histograms: Dict[str, Histogram] = {}
+    
+    def register(self, name: str, sql: str, variant: Hashable = None) -> TextClause:
+        statement = text(sql)
+        self._statements[(name, variant)] = statement
+        self.histograms.setdefault(name, Histogram(LATENCY_BUCKETS_MS))
+        return statement
+    
+    def get(self, name: str, variant: Hashable = None) -> TextClause:
+        return self._statements[(name, variant)]
+    
+    async def execute(self, executor, name: str, params: Optional[Dict] = None, variant: Hashable = None):
+        """Run a registered statement on a session or connection and time it."""
+        statement = self._statements[(name, variant)]
+        started = time.perf_counter()
+        try:
+            return await executor.execute(statement, params or {})
+        finally:
+            self.histograms[name].observe((time.perf_counter() - started) * 1e3)
+    
+    def stats(self) -> Dict[str, Dict]:
+        return {name: latency_summary(histogram) for name, histogram in self.histograms.items()}
+
+QUERIES = QueryRegistry()
+
+# Packages reference categories by a smallint id. Filters resolve the name
+# once (an InitPlan) so the scan is an index range on (category_id, name);
+# the name is joined back only for the rows being returned.
+CATEGORY_ID_SQL = "(SELECT id FROM categories WHERE name = :category)"
+
+# Category listing. Names are COLLATE "C" (models.NAME_COLLATION), so this
+# order and the cursor comparisons match the in-memory catalog snapshot
+QUERIES.register("category_count", f"""
+    SELECT COUNT(*) FROM packages WHERE category_id = {CATEGORY_ID_SQL}
+""")
+
+QUERIES.register("category_page", f"""
+    SELECT p.id, p.name, c.name AS category, p.description
+    FROM packages p
+    JOIN categories c ON c.id = p.category_id
+    WHERE p.category_id = {CATEGORY_ID_SQL}
+    ORDER BY p.name
+    OFFSET :offset LIMIT :limit
+""", variant=None)
+
+QUERIES.register("category_page", f"""
+    SELECT p.id, p.name, c.name AS category, p.description
+    FROM packages p
+    JOIN categories c ON c.id = p.category_id
+    WHERE p.category_id = {CATEGORY_ID_SQL} AND p.name > :cursor_name
+    ORDER BY p.name
+    LIMIT :limit
+""", variant="after")
+
+QUERIES.register("category_page", f"""
+    SELECT p.id, p.name, c.name AS category, p.description
+    FROM packages p
+    JOIN categories c ON c.id = p.category_id
+    WHERE p.category_id = {CATEGORY_ID_SQL} AND p.name < :cursor_name
+    ORDER BY p.name DESC
+    LIMIT :limit
+""", variant="before")
+
+# Search: "fts" ranks tsquery matches by ts_rank, "fuzzy" ranks trigram
+# matches on the name (served by the pg_trgm GIN index) by similarity
+SEARCH_MATCHES = {
+    "fts": """
+            SELECT p.id, p.name, c.name AS category, p.description,
+                   ts_rank(p.search_vector, query) as rank{total_column}
+            FROM packages p
+            JOIN categories c ON c.id = p.category_id,
+                 to_tsquery('english', :search_term) query
+            WHERE p.search_vector @@ query""",
+    "fuzzy": """
+            SELECT p.id, p.name, c.name AS category, p.description,
+                   similarity(p.name, :search_term) as rank{total_column}
+            FROM packages p
+            JOIN categories c ON c.id = p.category_id
+            WHERE p.name % :search_term""",
+}
+
+def _search_page_sql(mode: str, with_total: bool, direction: Optional[str]) -> str:
+    # The exact total rides along as a window aggregate computed before the
+    # keyset filter, so it always covers every match.
+    total_column = ", count(*) OVER () AS total" if with_total else ""
+    keyset_clause = ""
+    order_clause = "ORDER BY rank DESC, name"
+    if direction == "after":
+        keyset_clause = """
+        WHERE rank < CAST(:cursor_rank AS real)
+           OR (rank = CAST(:cursor_rank AS real) AND name > :cursor_name)"""
+    elif direction == "before":
+        keyset_clause = """
+        WHERE rank > CAST(:cursor_rank AS real)
+           OR (rank = CAST(:cursor_rank AS real) AND name < :cursor_name)"""
+        order_clause = "ORDER BY rank ASC, name DESC"
+    
+    matches = SEARCH_MATCHES[mode].format(total_column=total_column)
+    return f"""
+        WITH matches AS ({matches}
+        )
+        SELECT * FROM matches{keyset_clause}
+        {order_clause}
+        OFFSET :offset LIMIT :limit
+    """
+
+for _mode in SEARCH_MATCHES:
+    for _with_total in (True, False):
+        for _direction in (None, "after", "before"):
+            QUERIES.register(
+                "search_page",
+                _search_page_sql(_mode, _with_total, _direction),
+                variant=(_mode, _with_total, _direction)
+            )
+    
+    QUERIES.register(
+        "search_count",
+        "SELECT COUNT(*) FROM ({matches}) counted".format(
+            matches=SEARCH_MATCHES[_mode].format(total_column="")
+        ),
+        variant=_mode
+    )
+    
+    QUERIES.register(
+        "search_estimate",
+        "EXPLAIN (FORMAT JSON) {matches}".format(
+            matches=SEARCH_MATCHES[_mode].format(total_column="")
+        ),
+        variant=_mode
+    )
+
+# Exact package name short-circuit: the package itself, then its
+# name-prefix siblings, with no ranking (LIKE is served by the trigram index)
+QUERIES.register("search_name_prefix", """
+    SELECT p.id, p.name, c.name AS category, p.description, CAST(1 AS real) AS rank
+    FROM packages p
+    JOIN categories c ON c.id = p.category_id
+    WHERE p.name LIKE :prefix
+    ORDER BY p.name = :name DESC, p.name
+    LIMIT :limit
+""")
+
+# Catalog export, streamed through a server-side cursor
+QUERIES.register("export_packages", """
+    SELECT p.id, p.name, c.name AS category, p.description
+    FROM packages p
+    JOIN categories c ON c.id = p.category_id
+    ORDER BY p.id
+""")
+
+QUERIES.register("export_packages", f"""
+    SELECT p.id, p.name, c.name AS category, p.description
+    FROM packages p
+    JOIN categories c ON c.id = p.category_id
+    WHERE p.category_id = {CATEGORY_ID_SQL}
+    ORDER BY p.id
+""", variant="category")
+
+# Diagnose
+QUERIES.register("diagnose_fts", """
+    SELECT batch.ordinal, matches.name
+    FROM unnest(CAST(:ordinals AS integer[]), CAST(:terms AS text[]))
+         AS batch(ordinal, term)
+    CROSS JOIN LATERAL (
+        SELECT DISTINCT name
+        FROM packages,
+             to_tsquery('english', batch.term) query
+        WHERE search_vector @@ query
+        LIMIT 10
+    ) matches
+""")
+
+# ANY(array) keeps the SQL text fixed whatever the number of names
+QUERIES.register("diagnose_packages", """
+    SELECT p.id, p.name, c.name AS category, p.description
+    FROM packages p
+    JOIN categories c ON c.id = p.category_id
+    WHERE p.name = ANY(CAST(:names AS text[]))
+""")
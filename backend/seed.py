@@ -1,8 +1,29 @@
+import argparse
 import asyncio
+import hashlib
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Tuple, Union
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import init_db, async_session_maker
-from models import Package
-from categorizer import categorize_package, generate_description
+from cache import bump_dataset_version
+from categorizer import categorize_many, generate_description
+
+COPY_COLUMNS = ['id', 'name', 'category', 'description']
+SYNC_COLUMNS = ['name', 'category', 'description']
+
+def _usable_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# Categorization runs in a process pool, `SEED_CHUNK_SIZE` names per task;
+# 1 worker uses a single background thread instead
+SEED_WORKERS = int(os.getenv("SEED_WORKERS", "0")) or _usable_cpus()
+SEED_CHUNK_SIZE = int(os.getenv("SEED_CHUNK_SIZE", "5000"))
 
 # Complete list of 1,759 packages
 PACKAGE_NAMES = [
@@ -292,7 +313,7 @@ PACKAGE_NAMES = [
     "python-mako", "python-markdown", "python-markupsafe",
     "python-moddb", "python-more-itertools", "python-numpy",
     "python-packaging", "python-pexpect", "python-pillow", "python-pip",
-    "python-pipx"python-platformdirs", "python-psutil", "python-ptyprocess",
+    "python-pipx", "python-platformdirs", "python-psutil", "python-ptyprocess",
     "python-pycparser", "python-pygdbmi", "python-pyparsing",
     "python-pywal", "python-pyxdg", "python-qtpy", "python-requests",
     "python-screeninfo", "python-sentry_sdk", "python-setuptools",
@@ -414,8 +435,229 @@ PACKAGE_NAMES = [
     "zsh", "zsh-completions", "zstd", "zvbi", "zxing-cpp"
 ]
 
-async def seed_database():
-    """Seed the database with all 1,759 packages."""
+def package_rows(package_names: List[str], start_id: int = 1) -> Iterator[Tuple[int, str, str, str]]:
+    """Yield (id, name, category, description) records for the COPY stream."""
+    categories = categorize_many(package_names)
+    for idx, (package_name, category) in enumerate(zip(package_names, categories), start=start_id):
+        yield idx, package_name, category, generate_description(package_name, category)
+
+def categorize_chunk(package_names: List[str], start_id: int) -> Tuple[List[Tuple[int, str, str, str]], float]:
+    """Worker task: the rows for one chunk of names, and the seconds spent building them."""
+    started = time.perf_counter()
+    rows = list(package_rows(package_names, start_id))
+    return rows, time.perf_counter() - started
+
+class SeedStats:
+    """Throughput of the categorize -> write pipeline."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.chunks = 0
+        # Summed over workers, so it can exceed the wall time
+        self.categorize_seconds = 0.0
+        # Time the database writer sat waiting for the next chunk
+        self.stall_seconds = 0.0
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.rows / elapsed if elapsed > 0 else float(self.rows)
+        return (
+            f"{self.rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec) | "
+            f"{self.workers} workers, {self.chunks} chunks | "
+            f"categorize {self.categorize_seconds:.2f}s CPU, writer waited {self.stall_seconds:.2f}s"
+        )
+
+async def pipelined_rows(
+    package_names: List[str],
+    stats: SeedStats,
+    chunk_size: int = SEED_CHUNK_SIZE
+) -> AsyncIterator[Tuple[int, str, str, str]]:
+    """
+    Yield package rows in input order while later chunks are still being categorized.
+
+    Up to two chunks per worker are in flight, so the pool keeps working
+    while the consumer (COPY into the staging table) writes the current
+    one, and the event loop is never blocked by categorization.
+    """
+    loop = asyncio.get_running_loop()
+    workers = stats.workers
+    executor = ThreadPoolExecutor(1) if workers <= 1 else ProcessPoolExecutor(workers)
+    chunks = iter([
+        (package_names[start:start + chunk_size], start + 1)
+        for start in range(0, len(package_names), chunk_size)
+    ])
+    pending = deque()
+
+    def submit():
+        chunk = next(chunks, None)
+        if chunk is not None:
+            pending.append(loop.run_in_executor(executor, categorize_chunk, *chunk))
+
+    try:
+        for _ in range(max(workers, 1) * 2):
+            submit()
+        while pending:
+            waited = time.perf_counter()
+            rows, seconds = await pending.popleft()
+            stats.stall_seconds += time.perf_counter() - waited
+            submit()
+
+            stats.chunks += 1
+            stats.rows += len(rows)
+            stats.categorize_seconds += seconds
+            for row in rows:
+                yield row
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def content_hash(category: str, description: str) -> str:
+    """Hash of the derived package fields, mirrored by CONTENT_HASH_SQL."""
+    return hashlib.md5(f"{category}\x1f{description}".encode('utf-8')).hexdigest()
+
+# Over packages p JOIN categories c
+CONTENT_HASH_SQL = "md5(c.name || chr(31) || p.description)"
+
+async def stage_rows(session: AsyncSession, rows: Union[Iterable[tuple], AsyncIterable[tuple]], columns: List[str]):
+    """
+    Create the per-transaction staging table, COPY rows into it (rows may
+    be async) and add any category names not yet in `categories`.
+    """
+    await session.execute(text("""
+        CREATE TEMP TABLE packages_staging (
+            id integer,
+            name varchar(255) COLLATE "C",
+            category varchar(100) COLLATE "C",
+            description text
+        ) ON COMMIT DROP
+    """))
+
+    conn = await session.connection()
+    raw_conn = await conn.get_raw_connection()
+    await raw_conn.driver_connection.copy_records_to_table(
+        'packages_staging',
+        records=rows,
+        columns=columns
+    )
+
+    # Only genuinely new names reach the INSERT: a conflicting row would
+    # still burn a value of the smallint id sequence
+    await session.execute(text("""
+        INSERT INTO categories (name)
+        SELECT DISTINCT s.category
+        FROM packages_staging s
+        WHERE NOT EXISTS (SELECT 1 FROM categories c WHERE c.name = s.category)
+        ORDER BY s.category
+        ON CONFLICT (name) DO NOTHING
+    """))
+
+async def bulk_load_packages(
+    session: AsyncSession,
+    rows: Union[Iterable[Tuple[int, str, str, str]], AsyncIterable[Tuple[int, str, str, str]]]
+) -> int:
+    """
+    Stream package rows into Postgres with binary COPY.
+
+    Rows land in a temporary staging table and are moved into `packages`
+    with a single INSERT ... SELECT; `search_vector` is a generated column,
+    so every row is written exactly once.
+    """
+    await stage_rows(session, rows, COPY_COLUMNS)
+
+    result = await session.execute(text("""
+        INSERT INTO packages (id, name, category_id, description)
+        SELECT s.id, s.name, c.id, s.description
+        FROM packages_staging s
+        JOIN categories c ON c.name = s.category
+    """))
+
+    await advance_package_id_sequence(session)
+    return result.rowcount
+
+async def advance_package_id_sequence(session: AsyncSession):
+    """
+    Move the packages.id sequence past the highest id in the table.
+
+    Explicit ids (the bulk load, or a table filled by an older seeder)
+    bypass the sequence, so rows inserted later would otherwise collide
+    on packages_pkey. Safe to run repeatedly.
+    """
+    await session.execute(text("""
+        SELECT setval(pg_get_serial_sequence('packages', 'id'),
+                      COALESCE((SELECT MAX(id) FROM packages), 0) + 1, false)
+    """))
+
+async def sync_packages(session: AsyncSession, package_names: List[str], stats: SeedStats) -> Dict[str, int]:
+    """
+    Apply only the differences between `package_names` and the table.
+
+    Rows are compared by name and content hash; new and changed rows are
+    upserted through the staging table (so only they get a fresh
+    `search_vector`) and rows missing from the incoming list are deleted.
+    """
+    result = await session.execute(text(f"""
+        SELECT p.name, {CONTENT_HASH_SQL} AS content_hash
+        FROM packages p
+        JOIN categories c ON c.id = p.category_id
+    """))
+    existing = {row.name: row.content_hash for row in result}
+
+    incoming = set()
+    changed = []
+    inserted = 0
+    async for _, package_name, category, description in pipelined_rows(package_names, stats):
+        incoming.add(package_name)
+        current = existing.get(package_name)
+        if current == content_hash(category, description):
+            continue
+        if current is None:
+            inserted += 1
+        changed.append((package_name, category, description))
+
+    if changed:
+        await stage_rows(session, changed, SYNC_COLUMNS)
+        # New rows take their id from the sequence
+        await advance_package_id_sequence(session)
+        await session.execute(text("""
+            INSERT INTO packages (name, category_id, description)
+            SELECT s.name, c.id, s.description
+            FROM packages_staging s
+            JOIN categories c ON c.name = s.category
+            ON CONFLICT (name) DO UPDATE
+            SET category_id = EXCLUDED.category_id,
+                description = EXCLUDED.description
+        """))
+
+    removed = [name for name in existing if name not in incoming]
+    if removed:
+        await session.execute(
+            text("DELETE FROM packages WHERE name = ANY(:names)"),
+            {"names": removed}
+        )
+
+    if changed or removed:
+        # Categories left without packages
+        await session.execute(text("""
+            DELETE FROM categories c
+            WHERE NOT EXISTS (SELECT 1 FROM packages p WHERE p.category_id = c.id)
+        """))
+
+    return {
+        "inserted": inserted,
+        "updated": len(changed) - inserted,
+        "deleted": len(removed),
+        "unchanged": len(incoming) - len(changed)
+    }
+
+async def seed_database(package_names: List[str] = PACKAGE_NAMES, sync: bool = False, workers: int = SEED_WORKERS):
+    """
+    Load `package_names` into the database: the bundled PACKAGE_NAMES by
+    default, or any other list, such as a synthetic catalog of any size.
+
+    An empty table is bulk loaded. A populated table is left alone unless
+    `sync` is set, in which case only the differences are written.
+    """
     print("🔧 Initializing database schema...")
     await init_db()
     
@@ -425,42 +667,50 @@ async def seed_database():
         result = await session.execute(text("SELECT COUNT(*) FROM packages"))
         count = result.scalar()
         
-        if count > 0:
-            print(f"✅ Database already contains {count} packages. Skipping seed.")
-            return
-        
-        print(f"📊 Categorizing and inserting {len(PACKAGE_NAMES)} packages...")
-        
-        # Process packages in batches for better performance
-        batch_size = 100
-        for i in range(0, len(PACKAGE_NAMES), batch_size):
-            batch = PACKAGE_NAMES[i:i + batch_size]
+        if count > 0 and sync:
+            print(f"🔄 Syncing {len(package_names)} packages against {count} existing rows...")
+            seed_stats = SeedStats(workers)
             
-            for idx, package_name in enumerate(batch, start=i+1):
-                category = categorize_package(package_name)
-                description = generate_description(package_name, category)
-                
-                package = Package(
-                    id=idx,
-                    name=package_name,
-                    category=category,
-                    description=description
-                )
-                session.add(package)
+            stats = await sync_packages(session, package_names, seed_stats)
+            if stats['inserted'] or stats['updated'] or stats['deleted']:
+                await bump_dataset_version(session)
+            await session.commit()
             
-            await session.flush()
-            print(f"   Processed {min(i + batch_size, len(PACKAGE_NAMES))}/{len(PACKAGE_NAMES)} packages...")
+            print(
+                f"✨ Sync finished: {stats['inserted']} inserted, "
+                f"{stats['updated']} updated, {stats['deleted']} deleted, "
+                f"{stats['unchanged']} unchanged"
+            )
+            print(f"⏱️  {seed_stats.report()}")
+            return
         
-        # Create full-text search vectors
-        print("🔍 Creating full-text search indexes...")
-        await session.execute(text("""
-            UPDATE packages 
-            SET search_vector = to_tsvector('english', name || ' ' || description)
-        """))
+        if count > 0:
+            print(f"✅ Database already contains {count} packages. Skipping seed (use --sync to refresh).")
+            return
         
+        print(f"📊 Categorizing and bulk loading {len(package_names)} packages...")
+        seed_stats = SeedStats(workers)
+        
+        inserted = await bulk_load_packages(session, pipelined_rows(package_names, seed_stats))
+        await bump_dataset_version(session)
         await session.commit()
-        print(f"✨ Successfully seeded {len(PACKAGE_NAMES)} packages!")
+        
+        print(f"✨ Successfully seeded {inserted} packages")
+        print(f"⏱️  {seed_stats.report()}")
         print("🎉 Database is ready!")
 
 if __name__ == "__main__":
-    asyncio.run(seed_database())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the ArchLens package database")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Incrementally upsert/delete packages when the table is already populated"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=SEED_WORKERS,
+        help="Categorization processes (default: SEED_WORKERS or the usable CPUs; 1 uses a thread)"
+    )
+    args = parser.parse_args()
+    asyncio.run(seed_database(sync=args.sync, workers=args.workers))
@@ -0,0 +1,74 @@
+"""
+Package summaries and the JSON encoder used for API responses.
+
+Every endpoint that lists packages returns the same four fields, built
+once per package as a PackageSummary. Responses are encoded with orjson
+when it is installed (it serializes slotted dataclasses natively) and
+with the stdlib json module otherwise; handlers return FastJSONResponse
+directly so FastAPI's jsonable_encoder pass is skipped.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, Iterable, List
+
+from fastapi.responses import JSONResponse
+
+from timing import stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+@dataclass(frozen=True, slots=True)
+class PackageSummary:
+    id: int
+    name: str
+    category: str
+    description: str
+    
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "category": self.category,
+            "description": self.description
+        }
+
+def summarize(pkg: Any) -> PackageSummary:
+    """PackageSummary for an ORM object, result row or existing summary."""
+    if isinstance(pkg, PackageSummary):
+        return pkg
+    return PackageSummary(pkg.id, pkg.name, pkg.category, pkg.description)
+
+def summarize_all(packages: Iterable[Any]) -> List[PackageSummary]:
+    return [summarize(pkg) for pkg in packages]
+
+def _default(value: Any):
+    if isinstance(value, PackageSummary):
+        return value.as_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def stdlib_dumps(content: Any) -> bytes:
+    # Same settings as Starlette's JSONResponse
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_default
+    ).encode("utf-8")
+
+def orjson_dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+dumps = orjson_dumps if orjson is not None else stdlib_dumps
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with `dumps` (orjson when available)."""
+    
+    def render(self, content: Any) -> bytes:
+        with stage("encode"):
+            return dumps(content)
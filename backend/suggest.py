@@ -0,0 +1,76 @@
+"""
+In-memory prefix index behind /api/suggest.
+
+Package names are kept in one array sorted by their lowercase form, with
+a parallel array of (interned) categories. A prefix lookup is two binary
+searches for the bounds of the matching run plus a slice, so autocomplete
+never touches the database. The index is rebuilt from the packages table
+when the dataset version changes.
+"""
+import bisect
+import sys
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import text
+
+from cache import read_snapshot_version
+
+class SuggestIndex(NamedTuple):
+    version: int
+    keys: List[str]
+    names: List[str]
+    categories: List[str]
+    
+    def find(self, name: str) -> Optional[str]:
+        """
+        The stored package name equal to `name` ignoring case, or None.
+
+        An exact-case match wins when several names differ only by case.
+        """
+        key = name.lower()
+        i = bisect.bisect_left(self.keys, key)
+        found = None
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.names[i] == name:
+                return name
+            found = found or self.names[i]
+            i += 1
+        return found
+    
+    def lookup(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """Up to `limit` packages whose name starts with `prefix` (case-insensitive), in name order."""
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self.keys, prefix)
+        # Every key with this prefix sorts before prefix + the highest code point
+        end = bisect.bisect_left(self.keys, prefix + '\U0010ffff', start, min(start + limit, len(self.keys)))
+        return [
+            {"name": self.names[i], "category": self.categories[i]}
+            for i in range(start, end)
+        ]
+
+def build_suggest_index(version: int, names: Sequence[str], categories: Sequence[str]) -> SuggestIndex:
+    order = sorted(range(len(names)), key=lambda i: names[i].lower())
+    return SuggestIndex(
+        version=version,
+        keys=[names[i].lower() for i in order],
+        names=[names[i] for i in order],
+        categories=[sys.intern(categories[i]) for i in order]
+    )
+
+async def load_suggest_index(connect) -> SuggestIndex:
+    """Loader for a VersionedSnapshot holding the autocomplete index."""
+    async with connect() as conn:
+        version = await read_snapshot_version(conn)
+        result = await conn.execute(text("""
+            SELECT p.name, c.name AS category
+            FROM packages p
+            JOIN categories c ON c.id = p.category_id
+        """))
+        rows = result.all()
+    return build_suggest_index(
+        version,
+        [row.name for row in rows],
+        [row.category for row in rows]
+    )
@@ -0,0 +1,143 @@
+"""
+Per-request stage timing, Server-Timing headers and a sampled slow log.
+
+TimingMiddleware starts a RequestTiming for each HTTP request and keeps
+it in a context variable. Handlers wrap their stages in `stage(name)`,
+and the engine events in database.py report each SQL statement through
+record_query(). When the response starts, the stage durations go into a
+Server-Timing header. Requests slower than SLOW_REQUEST_MS are written
+to the "archlens.slow" logger as one JSON line, for a sampled fraction
+of them. The line holds the stages and every statement with its SQL
+text and bind parameters.
+
+Outside a request (the seeder, background reloads) record_query() logs
+slow statements on their own, sampled the same way.
+"""
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "250"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_LOG_SAMPLE_RATE = float(os.getenv("SLOW_LOG_SAMPLE_RATE", "1.0"))
+MAX_LOGGED_PARAMS_CHARS = 500
+
+logger = logging.getLogger("archlens.slow")
+
+class RequestTiming:
+    __slots__ = ("started", "stages", "queries")
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        # (name, milliseconds), in completion order; repeated names are summed in the header
+        self.stages: List[Tuple[str, float]] = []
+        # (sql, parameters, milliseconds)
+        self.queries: List[Tuple[str, Any, float]] = []
+    
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1e3
+    
+    def server_timing(self) -> str:
+        totals: Dict[str, float] = {}
+        for name, elapsed in self.stages:
+            totals[name] = totals.get(name, 0.0) + elapsed
+        if self.queries:
+            totals["db"] = sum(elapsed for _, _, elapsed in self.queries)
+        metrics = [f"{name};dur={elapsed:.2f}" for name, elapsed in totals.items()]
+        metrics.append(f"total;dur={self.elapsed_ms():.2f}")
+        return ", ".join(metrics)
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+@contextmanager
+def stage(name: str):
+    """Time a block as a named stage of the current request (a no-op outside one)."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.stages.append((name, (time.perf_counter() - started) * 1e3))
+
+def _sampled() -> bool:
+    return SLOW_LOG_SAMPLE_RATE >= 1 or random.random() < SLOW_LOG_SAMPLE_RATE
+
+def _loggable(parameters: Any) -> str:
+    text = repr(parameters)
+    if len(text) > MAX_LOGGED_PARAMS_CHARS:
+        text = text[:MAX_LOGGED_PARAMS_CHARS] + "..."
+    return text
+
+def record_query(statement: str, parameters: Any, elapsed_ms: float):
+    """Called by the engine events for every executed statement."""
+    timing = _current.get()
+    if timing is not None:
+        timing.queries.append((statement, parameters, elapsed_ms))
+    elif elapsed_ms >= SLOW_QUERY_MS and _sampled():
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "duration_ms": round(elapsed_ms, 3),
+            "sql": " ".join(statement.split()),
+            "params": _loggable(parameters)
+        }))
+
+def log_slow_request(method: str, path: str, status: int, timing: RequestTiming, total_ms: float):
+    logger.warning(json.dumps({
+        "event": "slow_request",
+        "method": method,
+        "path": path,
+        "status": status,
+        "duration_ms": round(total_ms, 3),
+        "stages": [{"name": name, "ms": round(elapsed, 3)} for name, elapsed in timing.stages],
+        "queries": [
+            {
+                "sql": " ".join(statement.split()),
+                "params": _loggable(parameters),
+                "ms": round(elapsed, 3)
+            }
+            for statement, parameters, elapsed in timing.queries
+        ]
+    }))
+
+class TimingMiddleware:
+    """ASGI middleware adding Server-Timing and logging sampled slow requests."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+    
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = 500
+    
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [
+                        (b"server-timing", timing.server_timing().encode("latin-1"))
+                    ]
+                }
+            await send(message)
+    
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
+            total_ms = timing.elapsed_ms()
+            if total_ms >= SLOW_REQUEST_MS and _sampled():
+                log_slow_request(scope["method"], scope["path"], status, timing, total_ms)
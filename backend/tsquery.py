@@ -0,0 +1,82 @@
+"""
+Safe construction of to_tsquery() input from free-form user text.
+
+Supported syntax:
+    pipewire audio     both words (or either, with operator='|')
+    "virtual machine"  phrase, words adjacent and in order
+    pipe*  /  pipe:*   prefix match
+    -nvidia  /  !nvidia  exclude a word or "phrase"
+
+Every term is emitted as a single-quoted tsquery lexeme with quotes and
+backslashes stripped, so characters like : ! ( & | in user input can never
+produce a syntax error; Postgres runs the quoted text through the same
+parser as to_tsvector. Compiled strings are cached per normalized input.
+"""
+import re
+from functools import lru_cache
+from typing import List, NamedTuple
+
+TERM_PATTERN = re.compile(r'([-!]?)(?:"([^"]*)"?|(\S+))')
+WORD_CHARS = re.compile(r"\w")
+UNSAFE_CHARS = re.compile(r"['\\]")
+
+class Term(NamedTuple):
+    text: str
+    negated: bool = False
+    prefix: bool = False
+
+def normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+def parse(text: str) -> List[Term]:
+    """Split search input into terms, dropping anything without word characters."""
+    terms = []
+    for negation, phrase, word in TERM_PATTERN.findall(normalize(text)):
+        prefix = False
+        if phrase:
+            value = phrase
+        else:
+            value = word
+            if value.endswith(':*'):
+                value, prefix = value[:-2], True
+            elif value.endswith('*'):
+                value, prefix = value.rstrip('*'), True
+        value = ' '.join(UNSAFE_CHARS.sub(' ', value).split())
+        if WORD_CHARS.search(value):
+            terms.append(Term(value, negated=bool(negation), prefix=prefix))
+    return terms
+
+def _lexeme(term: Term) -> str:
+    lexeme = f"'{term.text}'"
+    if term.prefix:
+        lexeme += ':*'
+    if term.negated:
+        lexeme = '!' + lexeme
+    return lexeme
+
+@lru_cache(maxsize=4096)
+def _compile(normalized: str, operator: str) -> str:
+    terms = parse(normalized)
+    positive = [_lexeme(term) for term in terms if not term.negated]
+    negative = [_lexeme(term) for term in terms if term.negated]
+    if not positive:
+        # A query of only exclusions would match nearly the whole table
+        return ''
+    query = f' {operator} '.join(positive)
+    if negative:
+        if operator == '|' and len(positive) > 1:
+            query = f'({query})'
+        query = ' & '.join([query] + negative)
+    return query
+
+def build_tsquery(text: str, operator: str = '&') -> str:
+    """
+    Compile user input into a to_tsquery() string joining terms with
+    `operator` ('&' or '|'). Returns '' when nothing searchable remains.
+    """
+    if operator not in ('&', '|'):
+        raise ValueError(f"Unsupported tsquery operator: {operator!r}")
+    return _compile(normalize(text), operator)
+
+def cache_info():
+    return _compile.cache_info()